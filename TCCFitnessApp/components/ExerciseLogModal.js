@@ -20,8 +20,18 @@ const ExerciseLogModal = ({ visible, onClose, initialSelectedExerciseId, initial
 
         (async () => {
             try {
-                const response = await api.get('/exercises/');
-                setExercises(response.data);
+                // The user's own exercises are listed with everyone's, so
+                // every page is needed for them to show up in the picker
+                const allExercises = [];
+                let after = null;
+
+                do {
+                    const response = await api.get('/exercises/', { params: { limit: 200, after } });
+                    allExercises.push(...response.data.items);
+                    after = response.data.nextAfter;
+                } while (after);
+
+                setExercises(allExercises);
             }
             catch (err) {
                 console.error('Error while trying to get exercises:', err);
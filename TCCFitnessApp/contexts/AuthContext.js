@@ -71,6 +71,14 @@ export const AuthProvider = ({ children }) => {
     };
 
     const logout = async () => {
+        try {
+            // Revoga os tokens no servidor
+            await api.post('/users/logout');
+        }
+        catch (err) {
+            console.error('Error while trying to logout:', err);
+        }
+
         await AsyncStorage.clear();
         setIsAuthenticated(false); // Atualiza estado após logout
 
@@ -14,7 +14,7 @@ const FoodSearchResults = ({ navigation, route }) => {
         setIsLoading(true);
         try {
             const response = await api.get(`/foods/?q=${query}`);
-            setResults(response.data);
+            setResults(response.data.items);
         } catch (error) {
             console.error(error);
         } finally {
@@ -25,7 +25,7 @@ const Search = ({ navigation, route }) => {
             } else {
                 try {
                     const response = await api.get(`/foods/?q=${query}`);
-                    setFilteredResults(response.data);
+                    setFilteredResults(response.data.items);
                 }
                 catch (err) {
                     console.error('Error fetching search results:', err);
@@ -0,0 +1,25 @@
+from typing import Any, Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+
+def insert_returning_ids(db: Session, model, rows: List[Dict[str, Any]]) -> List[int]:
+    """
+    This method will insert the rows with a multi-row INSERT and return
+    their ids in the order of `rows`.
+
+    SQLAlchemy only sorts the ids returned by a multi-row INSERT on the
+    dialects that tell which row each one belongs to, and falls back to an
+    INSERT per row on the others, SQLite included. SQLite gives each new row
+    the largest rowid plus one, so the ids of the rows inserted by a single
+    writer ascend in their order, and are sorted instead
+    """
+    statement = insert(model)
+
+    if db.get_bind().dialect.name == "sqlite":
+        return sorted(db.scalars(statement.returning(model.id), rows).all())
+
+    return db.scalars(
+        statement.returning(model.id, sort_by_parameter_order=True), rows
+    ).all()
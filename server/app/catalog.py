@@ -0,0 +1,417 @@
+import hashlib
+import json
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Set, TextIO, Tuple, Union
+
+from sqlalchemy import false, insert, text, update
+from sqlalchemy.orm import Session
+
+from app.bulk import insert_returning_ids
+from app.constants import (
+    CATALOG_IMPORT_BATCH_SIZE,
+    CATALOG_IMPORT_CHUNK_SIZE,
+    CATALOG_SYNC_LOCK_KEY,
+    DEFAULT_EXERCISES,
+    ENCODING,
+)
+from app.models import Exercise, Food, FoodConsumption, ServingSize
+from app.summaries import rebuild_daily_summaries
+
+# Whitespace and the commas between the items of a JSON array
+JSON_ARRAY_SEPARATORS = " \t\r\n,"
+
+# Name of the serving size holding the nutrients of the food itself
+DEFAULT_SERVING_SIZE_NAME = "100g"
+
+
+@dataclass
+class CatalogSyncResult:
+    foods_inserted: int = 0
+    foods_updated: int = 0
+    foods_deleted: int = 0
+    foods_unchanged: int = 0
+    serving_sizes_inserted: int = 0
+    serving_sizes_updated: int = 0
+    serving_sizes_deleted: int = 0
+    daily_summaries_rebuilt: int = 0
+
+    @property
+    def rows(self) -> int:
+        """
+        Rows read from the file, written or soft deleted
+        """
+        return (
+            self.foods_inserted
+            + self.foods_updated
+            + self.foods_deleted
+            + self.foods_unchanged
+            + self.serving_sizes_inserted
+            + self.serving_sizes_updated
+            + self.serving_sizes_deleted
+        )
+
+
+def iter_json_array(
+    file: TextIO, chunk_size: int = CATALOG_IMPORT_CHUNK_SIZE
+) -> Iterator[Any]:
+    """
+    This method will yield the items of the JSON array in the file one at a
+    time, reading it in chunks of `chunk_size` characters, so only the item
+    being decoded (and not the whole document) is held in memory
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    opened = False
+
+    while True:
+        while position < len(buffer) and buffer[position] in JSON_ARRAY_SEPARATORS:
+            position += 1
+
+        if position == len(buffer):
+            buffer, position = file.read(chunk_size), 0
+            if not buffer:
+                raise ValueError("Unexpected end of the JSON array")
+            continue
+
+        if not opened:
+            if buffer[position] != "[":
+                raise ValueError("Expected a JSON array")
+            opened = True
+            position += 1
+            continue
+
+        if buffer[position] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # The item continues in the next chunk
+            chunk = file.read(chunk_size)
+            if not chunk:
+                raise
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+
+        if end == len(buffer):
+            # A scalar ending the chunk may continue in the next one
+            chunk = file.read(chunk_size)
+            if chunk:
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+
+        yield item
+        position = end
+
+
+def iter_batches(items: Iterator[Any], size: int) -> Iterator[List[Any]]:
+    batch = []
+
+    for item in items:
+        batch.append(item)
+
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def get_nutrients(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "calories": item.get("kcal"),
+        "carbohydrates": item.get("carbohydrates"),
+        "proteins": item.get("protein"),
+        "lipids": item.get("lipids"),
+    }
+
+
+def get_serving_size_items(food_item: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"name": DEFAULT_SERVING_SIZE_NAME, **get_nutrients(food_item)},
+        *(
+            {"name": portion["name"], **get_nutrients(portion)}
+            for portion in food_item.get("portions", [])
+        ),
+    ]
+
+
+def number_keys(keys: List[Tuple], seen: Counter) -> List[Tuple]:
+    """
+    This method will append to each key how many times it was seen before,
+    telling apart the catalog items sharing a name (the file has a few foods
+    with the same name and description, and foods listing the same portion
+    twice) so the n-th of them always maps to the same row
+    """
+    numbered = []
+
+    for key in keys:
+        numbered.append((*key, seen[key]))
+        seen[key] += 1
+
+    return numbered
+
+
+def compute_food_content_hash(food_item: Dict[str, Any]) -> str:
+    """
+    This method will hash everything the catalog stores about a food item
+    of the file, including its portions, so a food whose hash didn't change
+    since the last sync can be skipped
+    """
+    content = json.dumps(food_item, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode(ENCODING)).hexdigest()
+
+
+def lock_catalog(db: Session) -> None:
+    """
+    This method will make the transaction the only one syncing the catalog
+    until it ends. Workers starting at once then sync one after the other,
+    and the later ones find the foods the first inserted instead of
+    inserting them again. It must run before the catalog is read.
+
+    PostgreSQL takes an advisory lock. SQLite has a single writer, so the
+    transaction takes the write lock up front with an update of no rows,
+    waiting on the busy timeout while another one holds it
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"), {"key": CATALOG_SYNC_LOCK_KEY}
+        )
+    else:
+        db.execute(update(Food).where(false()).values(id=Food.id))
+
+
+def get_catalog_foods(db: Session) -> Dict[Tuple, Tuple[int, str, bool]]:
+    """
+    This method will map the key of every catalog food (the foods without a
+    user), soft deleted ones included, to its id, content hash and whether
+    it is deleted
+    """
+    rows = (
+        db.query(Food.id, Food.name, Food.description, Food.content_hash, Food.deleted_at)
+        .filter(Food.user_id.is_(None))
+        .order_by(Food.id)
+        .all()
+    )
+    keys = number_keys([(name, description) for _, name, description, _, _ in rows], Counter())
+
+    return {
+        key: (food_id, content_hash, deleted_at is not None)
+        for key, (food_id, _, _, content_hash, deleted_at) in zip(keys, rows)
+    }
+
+
+def sync_serving_sizes(
+    db: Session, items_by_food_id: Dict[int, List[Dict[str, Any]]], result: CatalogSyncResult
+) -> List[int]:
+    """
+    This method will make the serving sizes of the given foods match their
+    items in the file: rows are matched by name, updated only when their
+    nutrients changed, inserted when missing and soft deleted when gone.
+    Returns the ids of the serving sizes whose nutrients changed
+    """
+    rows = (
+        db.query(
+            ServingSize.id,
+            ServingSize.food_id,
+            ServingSize.name,
+            ServingSize.calories,
+            ServingSize.carbohydrates,
+            ServingSize.proteins,
+            ServingSize.lipids,
+            ServingSize.deleted_at,
+        )
+        .filter(ServingSize.food_id.in_(items_by_food_id))
+        .order_by(ServingSize.id)
+        .all()
+    )
+    keys = number_keys([(row.food_id, row.name) for row in rows], Counter())
+    existing = dict(zip(keys, rows))
+
+    new_serving_sizes = []
+    updated_serving_sizes = []
+    changed_ids = []
+    for food_id, serving_size_items in items_by_food_id.items():
+        item_keys = number_keys(
+            [(food_id, item["name"]) for item in serving_size_items], Counter()
+        )
+
+        for key, values in zip(item_keys, serving_size_items):
+            row = existing.pop(key, None)
+
+            if row is None:
+                new_serving_sizes.append({"food_id": food_id, **values})
+                continue
+
+            changed = any(
+                getattr(row, column) != value for column, value in values.items()
+            )
+            if changed:
+                changed_ids.append(row.id)
+
+            if changed or row.deleted_at is not None:
+                updated_serving_sizes.append({"id": row.id, **values, "deleted_at": None})
+
+    deleted_ids = [row.id for row in existing.values() if row.deleted_at is None]
+
+    if new_serving_sizes:
+        db.execute(insert(ServingSize), new_serving_sizes)
+
+    if updated_serving_sizes:
+        db.execute(update(ServingSize), updated_serving_sizes)
+
+    if deleted_ids:
+        db.execute(
+            update(ServingSize)
+            .where(ServingSize.id.in_(deleted_ids))
+            .values(deleted_at=datetime.utcnow())
+        )
+
+    result.serving_sizes_inserted += len(new_serving_sizes)
+    result.serving_sizes_updated += len(updated_serving_sizes)
+    result.serving_sizes_deleted += len(deleted_ids)
+
+    return changed_ids
+
+
+def get_food_consumption_user_ids(db: Session, serving_size_ids: List[int]) -> Set[int]:
+    """
+    This method will return the users who logged any of the given serving
+    sizes
+    """
+    user_ids = set()
+
+    for ids in iter_batches(iter(serving_size_ids), CATALOG_IMPORT_BATCH_SIZE):
+        user_ids.update(
+            user_id
+            for user_id, in db.query(FoodConsumption.user_id)
+            .filter(FoodConsumption.serving_size_id.in_(ids))
+            .distinct()
+        )
+
+    return user_ids
+
+
+def sync_foods(db: Session, path: Union[str, Path]) -> CatalogSyncResult:
+    """
+    This method will bring the food catalog in line with the JSON file at
+    `path`, reading it in batches of CATALOG_IMPORT_BATCH_SIZE foods.
+
+    Foods are matched to the catalog rows (the ones without a user) by
+    name and description. Only the foods whose content hash changed are
+    written, along with their serving sizes (see sync_serving_sizes), and
+    the catalog foods missing from the file are soft deleted, so running it
+    again over the same file changes nothing. Rows are never removed, which
+    keeps the food consumptions pointing at them valid, and the daily
+    summaries of the users who logged a serving size whose nutrients
+    changed are rebuilt. The catalog is locked until the transaction ends
+    (see lock_catalog), and nothing is committed
+    """
+    result = CatalogSyncResult()
+
+    lock_catalog(db)
+
+    catalog_foods = get_catalog_foods(db)
+    seen_foods = Counter()
+    seen_food_ids = set()
+    changed_serving_size_ids = []
+
+    with open(path, "r", encoding="utf-8") as json_file:
+        for food_items in iter_batches(
+            iter_json_array(json_file), CATALOG_IMPORT_BATCH_SIZE
+        ):
+            keys = number_keys(
+                [(item["name"], item["description"]) for item in food_items],
+                seen_foods,
+            )
+
+            new_foods = []
+            updated_foods = []
+            for key, item in zip(keys, food_items):
+                values = {
+                    "name": item["name"],
+                    "description": item["description"],
+                    "content_hash": compute_food_content_hash(item),
+                    **get_nutrients(item),
+                }
+                catalog_food = catalog_foods.get(key)
+
+                if catalog_food is None:
+                    new_foods.append((item, values))
+                    continue
+
+                food_id, content_hash, deleted = catalog_food
+                seen_food_ids.add(food_id)
+
+                if content_hash == values["content_hash"] and not deleted:
+                    result.foods_unchanged += 1
+                else:
+                    updated_foods.append((item, {"id": food_id, **values, "deleted_at": None}))
+
+            if updated_foods:
+                db.execute(update(Food), [values for _, values in updated_foods])
+
+            items_by_food_id = {
+                values["id"]: get_serving_size_items(item) for item, values in updated_foods
+            }
+
+            if new_foods:
+                inserted_ids = insert_returning_ids(
+                    db, Food, [values for _, values in new_foods]
+                )
+
+                for (item, _), food_id in zip(new_foods, inserted_ids):
+                    items_by_food_id[food_id] = get_serving_size_items(item)
+
+            if items_by_food_id:
+                changed_serving_size_ids += sync_serving_sizes(
+                    db, items_by_food_id, result
+                )
+
+            result.foods_inserted += len(new_foods)
+            result.foods_updated += len(updated_foods)
+
+    deleted_ids = [
+        food_id
+        for food_id, _, deleted in catalog_foods.values()
+        if food_id not in seen_food_ids and not deleted
+    ]
+    for ids in iter_batches(iter(deleted_ids), CATALOG_IMPORT_BATCH_SIZE):
+        db.execute(
+            update(Food).where(Food.id.in_(ids)).values(deleted_at=datetime.utcnow())
+        )
+
+    result.foods_deleted = len(deleted_ids)
+
+    if changed_serving_size_ids:
+        # The food consumptions of those serving sizes now add up differently
+        user_ids = get_food_consumption_user_ids(db, changed_serving_size_ids)
+        if user_ids:
+            result.daily_summaries_rebuilt = rebuild_daily_summaries(db, user_ids)
+
+    return result
+
+
+def import_default_exercises(db: Session) -> int:
+    """
+    This method will add the default exercises missing from the catalog
+    (the exercises without a user), matched by name. Returns how many were
+    added. Nothing is committed
+    """
+    existing_names = {
+        name
+        for (name,) in db.query(Exercise.name).filter(Exercise.user_id.is_(None))
+    }
+    new_exercises = [
+        exercise for exercise in DEFAULT_EXERCISES if exercise["name"] not in existing_names
+    ]
+
+    if new_exercises:
+        db.execute(insert(Exercise), new_exercises)
+
+    return len(new_exercises)
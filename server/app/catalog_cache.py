@@ -0,0 +1,238 @@
+import bisect
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from app.constants import CATALOG_CACHE_TTL_IN_SECONDS
+from app.database import ReadSessionLocal
+from app.dependencies.database import get_read_db
+from app.models import Exercise, Food, ServingSize
+from app.pagination import PageParams, build_page
+
+
+@dataclass(frozen=True, slots=True)
+class ServingSizeRecord:
+    id: int
+    name: str
+    calories: Optional[float]
+    carbohydrates: Optional[float]
+    proteins: Optional[float]
+    lipids: Optional[float]
+    updated_at: datetime
+
+
+@dataclass(frozen=True, slots=True)
+class FoodRecord:
+    id: int
+    name: str
+    description: str
+    calories: Optional[float]
+    carbohydrates: Optional[float]
+    proteins: Optional[float]
+    lipids: Optional[float]
+    updated_at: datetime
+    serving_sizes: Tuple[ServingSizeRecord, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class ExerciseRecord:
+    id: int
+    name: str
+    calories_per_hour: int
+    updated_at: datetime
+
+
+class Catalog:
+    """
+    Immutable snapshot of the catalog foods (the current foods without a
+    user) with their current serving sizes, and of the exercises, which are
+    shared by every user
+    """
+
+    __slots__ = ("foods", "exercises", "exercise_ids")
+
+    def __init__(
+        self, foods: Dict[int, FoodRecord], exercises: Tuple[ExerciseRecord, ...]
+    ):
+        self.foods = foods
+        # Sorted by id, so pages are sliced as the keyset pagination would
+        self.exercises = exercises
+        self.exercise_ids = [exercise.id for exercise in exercises]
+
+    def get_food(self, food_id: int) -> Optional[FoodRecord]:
+        return self.foods.get(food_id)
+
+    def get_exercise(self, exercise_id: int) -> Optional[ExerciseRecord]:
+        index = bisect.bisect_left(self.exercise_ids, exercise_id)
+
+        if index < len(self.exercise_ids) and self.exercise_ids[index] == exercise_id:
+            return self.exercises[index]
+
+        return None
+
+    def paginate_exercises(self, page: PageParams):
+        start = (
+            bisect.bisect_right(self.exercise_ids, page.after)
+            if page.after is not None
+            else 0
+        )
+        items = self.exercises[start : start + page.limit + 1]
+
+        return build_page(list(items), page, lambda item: item.id)
+
+
+def load_catalog(db: Session) -> Catalog:
+    serving_sizes = {}
+    for row in (
+        db.query(
+            ServingSize.food_id,
+            ServingSize.id,
+            ServingSize.name,
+            ServingSize.calories,
+            ServingSize.carbohydrates,
+            ServingSize.proteins,
+            ServingSize.lipids,
+            ServingSize.updated_at,
+        )
+        .join(Food, ServingSize.food_id == Food.id)
+        .filter(
+            Food.user_id.is_(None),
+            Food.deleted_at.is_(None),
+            ServingSize.deleted_at.is_(None),
+        )
+        .order_by(ServingSize.id)
+    ):
+        serving_sizes.setdefault(row[0], []).append(ServingSizeRecord(*row[1:]))
+
+    foods = {
+        row.id: FoodRecord(*row, tuple(serving_sizes.get(row.id, ())))
+        for row in db.query(
+            Food.id,
+            Food.name,
+            Food.description,
+            Food.calories,
+            Food.carbohydrates,
+            Food.proteins,
+            Food.lipids,
+            Food.updated_at,
+        ).filter(Food.user_id.is_(None), Food.deleted_at.is_(None))
+    }
+
+    return Catalog(foods, load_exercises(db))
+
+
+def load_exercises(db: Session) -> Tuple[ExerciseRecord, ...]:
+    return tuple(
+        ExerciseRecord(*row)
+        for row in db.query(
+            Exercise.id, Exercise.name, Exercise.calories_per_hour, Exercise.updated_at
+        ).order_by(Exercise.id)
+    )
+
+
+class CatalogCache:
+    """
+    Per-process read-through cache of the Catalog, loaded on first use (or
+    warmed at startup) and dropped whenever a catalog food changes. When an
+    exercise changes, only the exercises are reloaded.
+
+    Changes made by other processes (other workers, the catalog sync
+    command) are only seen once the snapshot is older than
+    `ttl_in_seconds`
+    """
+
+    def __init__(self, ttl_in_seconds: float):
+        self.ttl_in_seconds = ttl_in_seconds
+        self._catalog: Optional[Catalog] = None
+        self._expires_at = 0.0
+        # Bumped on invalidation, so a snapshot loaded concurrently from
+        # data older than the change isn't kept
+        self._generation = 0
+        self._lock = threading.Lock()
+        # Held while loading, so concurrent misses load the catalog once
+        self._load_lock = threading.Lock()
+
+    def get_fresh(self) -> Optional[Catalog]:
+        catalog = self._catalog
+
+        if catalog is not None and time.monotonic() < self._expires_at:
+            return catalog
+
+        return None
+
+    def get(self, db: Session) -> Catalog:
+        if catalog := self.get_fresh():
+            return catalog
+
+        with self._load_lock:
+            if catalog := self.get_fresh():
+                return catalog
+
+            with self._lock:
+                generation = self._generation
+
+            catalog = load_catalog(db)
+
+            with self._lock:
+                if generation == self._generation:
+                    self._catalog = catalog
+                    self._expires_at = time.monotonic() + self.ttl_in_seconds
+
+        return catalog
+
+    def invalidate(self) -> None:
+        """
+        Must be called once the change is committed, or a concurrent load
+        could still read the data from before it
+        """
+        with self._lock:
+            self._generation += 1
+            self._catalog = None
+
+    def invalidate_exercises(self) -> None:
+        """
+        This method will reload the exercises of the snapshot and keep its
+        foods, which are by far the larger part, along with their expiry.
+        Must be called once the change is committed, like invalidate
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            catalog = self._catalog
+
+        if catalog is None:
+            return
+
+        db = ReadSessionLocal()
+        try:
+            exercises = load_exercises(db)
+        finally:
+            db.close()
+
+        with self._lock:
+            if generation == self._generation:
+                self._catalog = Catalog(catalog.foods, exercises)
+            else:
+                # Another change came in while loading, which this load may
+                # have missed
+                self._catalog = None
+
+
+catalog_cache = CatalogCache(CATALOG_CACHE_TTL_IN_SECONDS)
+
+
+def get_catalog(db: Session = Depends(get_read_db)) -> Catalog:
+    return catalog_cache.get(db)
+
+
+def warm_catalog_cache() -> None:
+    db = ReadSessionLocal()
+    try:
+        catalog_cache.get(db)
+    finally:
+        db.close()
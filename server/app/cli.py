@@ -0,0 +1,92 @@
+import argparse
+import time
+
+from app.catalog import import_default_exercises, sync_foods
+from app.constants import POPULATE_DB_JSON_FILE_PATH
+from app.database import SessionLocal
+from app.summaries import rebuild_daily_summaries
+
+
+def rebuild_daily_summaries_command(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        count = rebuild_daily_summaries(db, args.user_id)
+        db.commit()
+    finally:
+        db.close()
+
+    print(f"Rebuilt {count} daily summaries")
+
+
+def import_catalog_command(args: argparse.Namespace) -> None:
+    started_at = time.perf_counter()
+
+    db = SessionLocal()
+    try:
+        result = sync_foods(db, args.path)
+        exercises_inserted = import_default_exercises(db)
+
+        if args.dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started_at
+
+    print(
+        f"Foods: {result.foods_inserted} inserted, {result.foods_updated} updated, "
+        f"{result.foods_deleted} deleted, {result.foods_unchanged} unchanged"
+    )
+    print(
+        f"Serving sizes: {result.serving_sizes_inserted} inserted, "
+        f"{result.serving_sizes_updated} updated, "
+        f"{result.serving_sizes_deleted} deleted"
+    )
+    print(f"Exercises: {exercises_inserted} inserted")
+    print(f"Daily summaries: {result.daily_summaries_rebuilt} rebuilt")
+    print(f"{result.rows} rows in {elapsed:.2f}s ({result.rows / elapsed:.0f} rows/s)")
+
+    if args.dry_run:
+        print("Dry run, nothing was saved")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    subparsers = parser.add_subparsers(required=True)
+
+    rebuild_parser = subparsers.add_parser(
+        "rebuild-daily-summaries",
+        help="Recompute the daily summaries from the log tables",
+    )
+    rebuild_parser.add_argument(
+        "--user-id",
+        type=int,
+        action="append",
+        help="Only rebuild the summaries of this user (can be repeated)",
+    )
+    rebuild_parser.set_defaults(handler=rebuild_daily_summaries_command)
+
+    import_parser = subparsers.add_parser(
+        "import-catalog",
+        help="Sync the food catalog with a JSON file and add the default exercises",
+    )
+    import_parser.add_argument(
+        "--path",
+        default=POPULATE_DB_JSON_FILE_PATH,
+        help="JSON file with the foods (defaults to the bundled catalog)",
+    )
+    import_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report what would change without saving it",
+    )
+    import_parser.set_defaults(handler=import_catalog_command)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
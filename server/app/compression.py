@@ -0,0 +1,209 @@
+import zlib
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, responses are gzipped without it
+    brotli = None
+
+
+class GzipCompressor:
+    encoding = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    encoding = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def parse_accept_encoding(accept_encoding: str) -> Dict[str, float]:
+    qualities = {}
+
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+
+        if not coding:
+            continue
+
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        qualities[coding] = quality
+
+    return qualities
+
+
+class CompressionMiddleware:
+    """
+    Compresses the responses of at least `minimum_size` bytes with brotli,
+    when it is installed and accepted by the client, or else with gzip.
+
+    Unlike Starlette's GZipMiddleware, streamed chunks are flushed as they
+    are written, so a long export still arrives progressively, and event
+    streams are left alone, so every report token is sent right away
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int,
+        gzip_level: int,
+        brotli_quality: int,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def create_compressor(self, accept_encoding: str):
+        qualities = parse_accept_encoding(accept_encoding)
+        default_quality = qualities.get("*", 0.0)
+
+        if brotli is not None and qualities.get("br", default_quality) > 0:
+            return BrotliCompressor(self.brotli_quality)
+
+        if qualities.get("gzip", default_quality) > 0:
+            return GzipCompressor(self.gzip_level)
+
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("Accept-Encoding", "")
+        if not accept_encoding:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(self, accept_encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    def __init__(
+        self, middleware: CompressionMiddleware, accept_encoding: str, send: Send
+    ):
+        self.middleware = middleware
+        self.accept_encoding = accept_encoding
+        self._send = send
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+        # Set once the response start was sent, compressed or not
+        self.started = False
+
+    def is_compressible(self, message: Message) -> bool:
+        headers = Headers(raw=self.start_message["headers"])
+
+        if "content-encoding" in headers:
+            return False
+
+        if headers.get("content-type", "").startswith("text/event-stream"):
+            return False
+
+        # A streamed body's size is unknown, so it is compressed anyway
+        return (
+            message.get("more_body", False)
+            or len(message.get("body", b"")) >= self.middleware.minimum_size
+        )
+
+    def compress(self, message: Message) -> bytes:
+        body = self.compressor.compress(message.get("body", b""))
+
+        if message.get("more_body", False):
+            return body + self.compressor.flush()
+
+        return body + self.compressor.finish()
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        if not self.started:
+            self.started = True
+
+            if self.is_compressible(message):
+                self.compressor = self.middleware.create_compressor(
+                    self.accept_encoding
+                )
+
+            if self.compressor is None:
+                await self._send(self.start_message)
+            else:
+                await self.send_compressed_start(message)
+                return
+
+        if self.compressor is None:
+            await self._send(message)
+            return
+
+        await self._send({
+            "type": "http.response.body",
+            "body": self.compress(message),
+            "more_body": message.get("more_body", False),
+        })
+
+    async def send_compressed_start(self, message: Message) -> None:
+        body = self.compress(message)
+
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.compressor.encoding
+        headers.add_vary_header("Accept-Encoding")
+
+        # The compressed bytes are another representation, so a strong ETag
+        # only holds for the weak comparison If-None-Match uses
+        etag = headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+        if message.get("more_body", False):
+            # A streamed body's length isn't known until it ends
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(body))
+
+        await self._send(self.start_message)
+        await self._send({
+            "type": "http.response.body",
+            "body": body,
+            "more_body": message.get("more_body", False),
+        })
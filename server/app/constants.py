@@ -4,8 +4,62 @@ SECRET_KEY = "WQcfyGkFjlf77HwKfNY5aGhUaJMxChO2N9o6Vvh2byM="
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_IN_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 200
+
+# Logs accepted by a single batch create request
+MAX_BATCH_SIZE = 200
+
+# The food and exercise catalog is cached per process, so a change made
+# through another worker (or by the catalog sync) is seen after at most this
+# long
+CATALOG_CACHE_TTL_IN_SECONDS = 300
+
+# Cache-Control of the responses with an ETag. Catalog foods may be reused
+# for as long as the server caches them, everything else is revalidated
+CATALOG_CACHE_CONTROL = f"private, max-age={CATALOG_CACHE_TTL_IN_SECONDS}"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+# Verified tokens memoized per process
+TOKEN_CACHE_MAX_SIZE = 10_000
+
+# Rows fetched from the database, and records written to the response, at a
+# time when exporting a user's diary
+EXPORT_BATCH_SIZE = 1000
 ENCODING = "utf-8"
 
+# Responses smaller than this are sent as they are, since compressing them
+# saves less than it costs. Dynamic responses favor speed over ratio
+COMPRESSION_MINIMUM_SIZE = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 4
+
+# bcrypt is CPU-bound, so hashing runs on its own bounded pool of threads
+PASSWORD_HASHING_MAX_WORKERS = 4
+
+OPENAI_MODEL = "gpt-4o-mini"
+OPENAI_TIMEOUT_IN_SECONDS = 30
+
+# Days whose summaries are rebuilt by a single set of queries, which bounds
+# the parameters of their filters
+SUMMARY_REBUILD_BATCH_SIZE = 500
+
+# A day is within the goal when its intake is this close to the goal calories
+GOAL_ADHERENCE_TOLERANCE = 0.1
+
+REPORT_JOBS_MAX_CONCURRENCY = 4
+REPORT_JOBS_MAX_ATTEMPTS = 3
+REPORT_JOBS_RETRY_BACKOFF_IN_SECONDS = 2
+REPORT_JOBS_RETENTION_IN_MINUTES = 30
+REPORT_JOBS_KEEP_ALIVE_IN_SECONDS = 15
+# Jobs run by another worker are read again this often while streamed
+REPORT_JOBS_POLL_INTERVAL_IN_SECONDS = 1
+# A job in flight without progress for this long lost its worker
+REPORT_JOBS_STALE_AFTER_IN_MINUTES = 10
+# Jobs in flight, queued or running, write their progress this often
+REPORT_JOBS_HEARTBEAT_INTERVAL_IN_SECONDS = 60
+
 DEFAULT_MEALS = [
     {
         "name": "Café da Manhã",
@@ -86,6 +140,13 @@ DEFAULT_EXERCISES = [
 
 POPULATE_DB_JSON_FILE_PATH = Path(__file__).parent / "resources" / "foods.json"
 
+# Foods written per statement when importing the catalog, and characters
+# read from the file at a time
+CATALOG_IMPORT_BATCH_SIZE = 500
+CATALOG_IMPORT_CHUNK_SIZE = 64 * 1024
+# Key of the PostgreSQL advisory lock held while syncing the catalog
+CATALOG_SYNC_LOCK_KEY = 0x6E7574726974
+
 OPENAI_SYSTEM_PROMPT = """
 Você é um especialista em nutrição e alimentação saudável. O seu trabalho é,
 dado um diário alimentar de um paciente, dizer se está de acordo com o objetivo estabelecido e com 
@@ -1,18 +1,22 @@
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
+from app.catalog_cache import Catalog, catalog_cache, get_catalog
+from app.constants import REVALIDATE_CACHE_CONTROL
 from app.dependencies.auth import get_current_user
 from app.dependencies.database import get_db
-from app.models import Exercise
+from app.http_cache import check_etag, compute_etag
+from app.models import Exercise, ExerciseLog
+from app.pagination import PageParams, get_page_params, paginate
 from app.schemas import (
     ExerciseCreate,
     ExerciseRead,
     ExerciseUpdate,
+    Page,
     SimpleResultMessage,
     UserRead,
 )
+from app.summaries import rebuild_daily_summaries
 
 router = APIRouter(
     prefix="/exercises",
@@ -21,34 +25,55 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=List[ExerciseRead])
-async def get_exercises(
-    current_user: UserRead = Depends(get_current_user), db: Session = Depends(get_db)
+@router.get("/", response_model=Page[ExerciseRead])
+def get_exercises(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(get_page_params),
+    current_user: UserRead = Depends(get_current_user),
+    catalog: Catalog = Depends(get_catalog),
 ):
-    return db.query(Exercise).all()
+    result = catalog.paginate_exercises(page)
+
+    etag = compute_etag(
+        [(exercise.id, exercise.updated_at) for exercise in result["items"]],
+        result["next_after"],
+    )
+    check_etag(request, response, etag, REVALIDATE_CACHE_CONTROL)
+
+    return result
 
 
-@router.get("/me", response_model=List[ExerciseRead])
+@router.get("/me", response_model=Page[ExerciseRead])
 def get_user_exercises(
-    current_user: UserRead = Depends(get_current_user), db: Session = Depends(get_db)
+    page: PageParams = Depends(get_page_params),
+    current_user: UserRead = Depends(get_current_user),
+    db: Session = Depends(get_db),
 ):
-    return db.query(Exercise).filter(Exercise.user_id == current_user.id).all()
+    return paginate(
+        db.query(Exercise).filter(Exercise.user_id == current_user.id), page
+    )
 
 
 @router.get("/{exercise_id}", response_model=ExerciseRead)
-async def get_exercise_by_id(
+def get_exercise_by_id(
     exercise_id: int,
+    request: Request,
+    response: Response,
     current_user: UserRead = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    catalog: Catalog = Depends(get_catalog),
 ):
-    exercise_db = db.query(Exercise).filter(Exercise.id == exercise_id).first()
+    exercise = catalog.get_exercise(exercise_id)
 
-    if not exercise_db:
+    if not exercise:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Exercise not found"
         )
 
-    return exercise_db
+    etag = compute_etag(exercise.id, exercise.updated_at)
+    check_etag(request, response, etag, REVALIDATE_CACHE_CONTROL)
+
+    return exercise
 
 
 @router.post("/", response_model=ExerciseRead)
@@ -62,6 +87,7 @@ def create_exercise(
     db.add(exercise_db)
     db.commit()
     db.refresh(exercise_db)
+    catalog_cache.invalidate_exercises()
 
     return exercise_db
 
@@ -83,14 +109,25 @@ def update_exercise(
     for key, value in exercise.dict(exclude_unset=True).items():
         setattr(exercise_db, key, value)
 
+    if "calories_per_hour" in exercise.dict(exclude_unset=True):
+        # Every day this exercise was practiced on now burns a different amount
+        days = (
+            db.query(ExerciseLog.user_id, ExerciseLog.practice_date)
+            .filter(ExerciseLog.exercise_id == exercise_id)
+            .distinct()
+        )
+        db.flush()
+        rebuild_daily_summaries(db, days=[tuple(day) for day in days])
+
     db.commit()
     db.refresh(exercise_db)
+    catalog_cache.invalidate_exercises()
 
     return exercise_db
 
 
 @router.delete("/{exercise_id}", response_model=SimpleResultMessage)
-async def delete_exercise(
+def delete_exercise(
     exercise_id: int,
     current_user: UserRead = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -102,7 +139,21 @@ async def delete_exercise(
             status_code=status.HTTP_404_NOT_FOUND, detail="Exercise not found"
         )
 
+    # The exercise's logs go with it, so the days it was practiced on burn
+    # less. They are deleted here rather than by the foreign key, which
+    # SQLite doesn't enforce
+    exercise_logs = db.query(ExerciseLog).filter(ExerciseLog.exercise_id == exercise_id)
+    days = {
+        (user_id, practice_date)
+        for user_id, practice_date in exercise_logs.with_entities(
+            ExerciseLog.user_id, ExerciseLog.practice_date
+        ).distinct()
+    }
+    exercise_logs.delete(synchronize_session=False)
     db.delete(exercise_db)
+    db.flush()
+    rebuild_daily_summaries(db, days=days)
     db.commit()
+    catalog_cache.invalidate_exercises()
 
     return {"message": "Exercise deleted successfully"}
@@ -1,18 +1,35 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
-from app.dependencies.auth import get_current_user
+from app.bulk import insert_returning_ids
+from app.constants import MAX_BATCH_SIZE
+
+from app.dependencies.auth import get_current_user, get_list_user_id
 from app.dependencies.database import get_db
-from app.models import ExerciseLog
+from app.enums import ResponseViews
+from app.included import build_included
+from app.loaders import EXERCISE_LOG_READ_OPTIONS
+from app.models import Exercise, ExerciseLog
+from app.pagination import PageParams, get_page_params, paginate
 from app.schemas import (
+    BatchCreateResult,
+    CompactPage,
     ExerciseLogCreate,
     ExerciseLogRead,
+    ExerciseLogSummary,
     ExerciseLogUpdate,
+    Page,
     SimpleResultMessage,
     UserRead,
 )
+from app.serialization import ResponseSerializer
+from app.summaries import (
+    apply_exercise_log,
+    exercise_totals,
+    increment_daily_summaries,
+)
 
 
 router = APIRouter(
@@ -22,12 +39,37 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=List[ExerciseLogRead])
+EXERCISE_LOG_PAGE_SERIALIZER = ResponseSerializer(Page[ExerciseLogRead])
+COMPACT_EXERCISE_LOG_PAGE_SERIALIZER = ResponseSerializer(
+    CompactPage[ExerciseLogSummary]
+)
+
+
+@router.get(
+    "/",
+    response_model=Page[ExerciseLogRead] | CompactPage[ExerciseLogSummary],
+)
 def get_exercise_logs(
-    current_user: UserRead = Depends(get_current_user),
+    page: PageParams = Depends(get_page_params),
+    view: ResponseViews = Query(
+        ResponseViews.FULL,
+        description="Compact returns summaries and side-loads the exercises",
+    ),
+    user_id: Optional[int] = Depends(get_list_user_id),
     db: Session = Depends(get_db),
 ):
-    return db.query(ExerciseLog).all()
+    query = db.query(ExerciseLog).options(*EXERCISE_LOG_READ_OPTIONS)
+
+    if user_id is not None:
+        query = query.filter(ExerciseLog.user_id == user_id)
+
+    result = paginate(query, page)
+
+    if view == ResponseViews.COMPACT:
+        result["included"] = build_included(exercise_logs=result["items"])
+        return COMPACT_EXERCISE_LOG_PAGE_SERIALIZER.response(result)
+
+    return EXERCISE_LOG_PAGE_SERIALIZER.response(result)
 
 
 @router.get("/{exercise_log_id}", response_model=ExerciseLogRead)
@@ -57,12 +99,61 @@ def create_exercise_log(
     exercise_log_db = ExerciseLog(**exercise_log.dict(), user_id=current_user.id)
 
     db.add(exercise_log_db)
+    apply_exercise_log(db, exercise_log_db)
     db.commit()
     db.refresh(exercise_log_db)
 
     return exercise_log_db
 
 
+@router.post("/batch", response_model=BatchCreateResult)
+def create_exercise_logs(
+    exercise_logs: List[ExerciseLogCreate] = Body(
+        min_length=1, max_length=MAX_BATCH_SIZE
+    ),
+    current_user: UserRead = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Creates every exercise log in one transaction, or none of them when any
+    refers to a missing exercise
+    """
+    calories_per_hour = dict(
+        db.query(Exercise.id, Exercise.calories_per_hour).filter(
+            Exercise.id.in_({item.exercise_id for item in exercise_logs})
+        )
+    )
+
+    for item in exercise_logs:
+        if item.exercise_id not in calories_per_hour:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Exercise {item.exercise_id} not found",
+            )
+
+    ids = insert_returning_ids(
+        db,
+        ExerciseLog,
+        [{**item.dict(), "user_id": current_user.id} for item in exercise_logs],
+    )
+    increment_daily_summaries(
+        db,
+        current_user.id,
+        (
+            (
+                item.practice_date,
+                exercise_totals(
+                    calories_per_hour[item.exercise_id], item.duration_in_hours
+                ),
+            )
+            for item in exercise_logs
+        ),
+    )
+    db.commit()
+
+    return {"ids": ids}
+
+
 @router.put("/{exercise_log_id}", response_model=ExerciseLogRead)
 def update_exercise_log(
     exercise_log_id: int,
@@ -85,9 +176,12 @@ def update_exercise_log(
             detail="You do not have permision to delete this exercise log",
         )
 
+    apply_exercise_log(db, exercise_log_db, sign=-1)
+
     for key, value in exercise_log.dict(exclude_unset=True).items():
         setattr(exercise_log_db, key, value)
 
+    apply_exercise_log(db, exercise_log_db)
     db.commit()
     db.refresh(exercise_log_db)
 
@@ -115,6 +209,7 @@ def delete_exercise_log(
             detail="You do not have permision to delete this exercise log",
         )
 
+    apply_exercise_log(db, exercise_log_db, sign=-1)
     db.delete(exercise_log_db)
     db.commit()
 
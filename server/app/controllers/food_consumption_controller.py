@@ -1,18 +1,38 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
-from app.dependencies.auth import get_current_user
+from app.bulk import insert_returning_ids
+from app.constants import MAX_BATCH_SIZE
+
+from app.dependencies.auth import get_current_user, get_list_user_id
 from app.dependencies.database import get_db
-from app.models import FoodConsumption
+from app.enums import ResponseViews
+from app.included import build_included
+from app.loaders import (
+    FOOD_CONSUMPTION_READ_OPTIONS,
+    FOOD_CONSUMPTION_SUMMARY_OPTIONS,
+)
+from app.models import Food, FoodConsumption, Meal, ServingSize
+from app.pagination import PageParams, get_page_params, paginate
 from app.schemas import (
+    BatchCreateResult,
+    CompactPage,
     FoodConsumptionCreate,
     FoodConsumptionRead,
+    FoodConsumptionSummary,
     FoodConsumptionUpdate,
+    Page,
     SimpleResultMessage,
     UserRead,
 )
+from app.serialization import ResponseSerializer
+from app.summaries import (
+    apply_food_consumption,
+    increment_daily_summaries,
+    serving_size_totals,
+)
 
 router = APIRouter(
     prefix="/food-consumptions",
@@ -21,12 +41,43 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=List[FoodConsumptionRead])
+FOOD_CONSUMPTION_PAGE_SERIALIZER = ResponseSerializer(Page[FoodConsumptionRead])
+COMPACT_FOOD_CONSUMPTION_PAGE_SERIALIZER = ResponseSerializer(
+    CompactPage[FoodConsumptionSummary]
+)
+
+
+@router.get(
+    "/",
+    response_model=Page[FoodConsumptionRead] | CompactPage[FoodConsumptionSummary],
+)
 def get_food_comsuptions(
-    current_user: UserRead = Depends(get_current_user),
+    page: PageParams = Depends(get_page_params),
+    view: ResponseViews = Query(
+        ResponseViews.FULL,
+        description=(
+            "Compact returns summaries and side-loads the foods, serving sizes "
+            "and meals"
+        ),
+    ),
+    user_id: Optional[int] = Depends(get_list_user_id),
     db: Session = Depends(get_db),
 ):
-    return db.query(FoodConsumption).all()
+    if view == ResponseViews.COMPACT:
+        query = db.query(FoodConsumption).options(*FOOD_CONSUMPTION_SUMMARY_OPTIONS)
+    else:
+        query = db.query(FoodConsumption).options(*FOOD_CONSUMPTION_READ_OPTIONS)
+
+    if user_id is not None:
+        query = query.filter(FoodConsumption.user_id == user_id)
+
+    result = paginate(query, page)
+
+    if view == ResponseViews.COMPACT:
+        result["included"] = build_included(food_consumptions=result["items"])
+        return COMPACT_FOOD_CONSUMPTION_PAGE_SERIALIZER.response(result)
+
+    return FOOD_CONSUMPTION_PAGE_SERIALIZER.response(result)
 
 
 @router.get("/{food_consumption_id}", response_model=FoodConsumptionRead)
@@ -37,6 +88,7 @@ def get_food_comsuption(
 ):
     food_consumption_db = (
         db.query(FoodConsumption)
+        .options(*FOOD_CONSUMPTION_READ_OPTIONS)
         .filter(FoodConsumption.id == food_consumption_id)
         .first()
     )
@@ -60,12 +112,86 @@ def create_food_consumption(
     )
 
     db.add(food_consumption_db)
+    apply_food_consumption(db, food_consumption_db)
     db.commit()
     db.refresh(food_consumption_db)
 
     return food_consumption_db
 
 
+@router.post("/batch", response_model=BatchCreateResult)
+def create_food_consumptions(
+    food_consumptions: List[FoodConsumptionCreate] = Body(
+        min_length=1, max_length=MAX_BATCH_SIZE
+    ),
+    current_user: UserRead = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Creates every food consumption (e.g. a whole meal) in one transaction,
+    or none of them when any refers to a missing food, serving size or meal
+    """
+    serving_sizes = {
+        (serving_size.food_id, serving_size.id): serving_size
+        for serving_size in db.query(
+            ServingSize.id,
+            ServingSize.food_id,
+            ServingSize.calories,
+            ServingSize.carbohydrates,
+            ServingSize.proteins,
+            ServingSize.lipids,
+        )
+        .join(Food, ServingSize.food_id == Food.id)
+        .filter(
+            ServingSize.id.in_({item.serving_size_id for item in food_consumptions}),
+            ServingSize.deleted_at.is_(None),
+            Food.deleted_at.is_(None),
+        )
+    }
+    meal_ids = {
+        meal_id
+        for (meal_id,) in db.query(Meal.id).filter(
+            Meal.id.in_({item.meal_id for item in food_consumptions}),
+            Meal.user_id == current_user.id,
+        )
+    }
+
+    for item in food_consumptions:
+        if (item.food_id, item.serving_size_id) not in serving_sizes:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Serving size {item.serving_size_id} of food {item.food_id} not found",
+            )
+
+        if item.meal_id not in meal_ids:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Meal {item.meal_id} not found",
+            )
+
+    ids = insert_returning_ids(
+        db,
+        FoodConsumption,
+        [{**item.dict(), "user_id": current_user.id} for item in food_consumptions],
+    )
+    increment_daily_summaries(
+        db,
+        current_user.id,
+        (
+            (
+                item.consumption_date,
+                serving_size_totals(
+                    serving_sizes[(item.food_id, item.serving_size_id)], item.quantity
+                ),
+            )
+            for item in food_consumptions
+        ),
+    )
+    db.commit()
+
+    return {"ids": ids}
+
+
 @router.put("/{food_consumption_id}", response_model=FoodConsumptionRead)
 def update_food_consumption(
     food_consumption_id: int,
@@ -86,9 +212,12 @@ def update_food_consumption(
             status_code=status.HTTP_404_NOT_FOUND, detail="Food consumption not found"
         )
 
+    apply_food_consumption(db, food_consumption_db, sign=-1)
+
     for key, value in food_consumption.dict(exclude_unset=True).items():
         setattr(food_consumption_db, key, value)
 
+    apply_food_consumption(db, food_consumption_db)
     db.commit()
     db.refresh(food_consumption_db)
 
@@ -112,6 +241,7 @@ def delete_food_consumption(
             status_code=status.HTTP_404_NOT_FOUND, detail="Food consumption not found"
         )
 
+    apply_food_consumption(db, food_consumption_db, sign=-1)
     db.delete(food_consumption_db)
     db.commit()
 
@@ -1,21 +1,28 @@
-from difflib import SequenceMatcher
 from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func, case
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
+from app.catalog_cache import Catalog, catalog_cache, get_catalog
+from app.constants import CATALOG_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL
 from app.dependencies.auth import get_current_user, get_db
-from app.models import Food
+from app.http_cache import check_etag, compute_food_etag
+from app.loaders import FOOD_READ_OPTIONS
+from app.models import Food, FoodConsumption
+from app.pagination import PageParams, build_page, get_page_params, paginate
 from app.schemas import (
     FoodCreate,
     FoodRead,
     FoodSearch,
     FoodUpdate,
+    Page,
     ServingSizeRead,
     SimpleResultMessage,
-    UserRead
+    UserRead,
 )
+from app.search import search_foods
+from app.serialization import ResponseSerializer
+from app.summaries import rebuild_daily_summaries
 
 
 router = APIRouter(
@@ -25,53 +32,78 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=None)
-async def get_foods(
+FOOD_PAGE_SERIALIZER = ResponseSerializer(Page[FoodRead])
+
+
+@router.get("/", response_model=Page[FoodRead] | Page[FoodSearch])
+def get_foods(
     q: Optional[str] = Query(
         None, description="The search term used to filter foods"
     ),
+    page: PageParams = Depends(get_page_params),
     current_user: UserRead = Depends(get_current_user),
     db: Session = Depends(get_db),
-) -> List[FoodRead] | List[FoodSearch]:
+):
     if q:
-        result = (
-            db.query(Food.id, Food.name, Food.description)
-            .filter(
-                (Food.name.ilike(f"%{q}%")) | (Food.description.ilike(f"%{q}%"))
-            )
-            .all()
-        )
+        # Search results are sorted by rank, so their cursor is a position
+        offset = page.after or 0
+        result = search_foods(db, q, limit=page.limit + 1, offset=offset)
 
-        def similarity_score(item):
-            combined_text = f"{item[1]} {item[2]}"
-            return SequenceMatcher(None, combined_text.lower(), q.lower()).ratio()
-
-        result = sorted(result, key=similarity_score, reverse=True)
-
-        return [
+        items = [
             {"id": id, "name": name, "description": description}
             for id, name, description in result
         ]
 
-    return db.query(Food).all()
+        return build_page(items, page, lambda item: offset + page.limit)
 
+    return FOOD_PAGE_SERIALIZER.response(
+        paginate(
+            db.query(Food)
+            .options(*FOOD_READ_OPTIONS)
+            .filter(Food.deleted_at.is_(None)),
+            page,
+        )
+    )
 
-@router.get("/{food_id}", response_model=FoodRead)
-async def get_food(
-    food_id: int,
-    current_user: UserRead = Depends(get_current_user),
-    db: Session = Depends(get_db),
+
+def get_cached_food(
+    food_id: int, catalog: Catalog, db: Session, request: Request, response: Response
 ):
-    food = db.query(Food).filter(Food.id == food_id).first()
+    """
+    This method will return the food from the catalog cache, or from the
+    database when it isn't a catalog food, answering with a 304 when the
+    client already has it
+    """
+    if food := catalog.get_food(food_id):
+        check_etag(request, response, compute_food_etag(food), CATALOG_CACHE_CONTROL)
+        return food
+
+    food = (
+        db.query(Food).options(*FOOD_READ_OPTIONS).filter(Food.id == food_id).first()
+    )
 
     if not food:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Food not found"
         )
 
+    check_etag(request, response, compute_food_etag(food), REVALIDATE_CACHE_CONTROL)
+
     return food
 
 
+@router.get("/{food_id}", response_model=FoodRead)
+def get_food(
+    food_id: int,
+    request: Request,
+    response: Response,
+    current_user: UserRead = Depends(get_current_user),
+    catalog: Catalog = Depends(get_catalog),
+    db: Session = Depends(get_db),
+):
+    return get_cached_food(food_id, catalog, db, request, response)
+
+
 @router.post("/", response_model=FoodRead)
 def create_food(
     food: FoodCreate,
@@ -112,6 +144,9 @@ def update_food(
     db.commit()
     db.refresh(food_db)
 
+    if food_db.user_id is None:
+        catalog_cache.invalidate()
+
     return food_db
 
 
@@ -133,23 +168,37 @@ def delete_food(
             status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to delete this food"
         )
 
+    # The food's consumptions go with it, so the days they were logged on
+    # add up differently. They are deleted here rather than by the foreign
+    # key, which SQLite doesn't enforce
+    food_consumptions = db.query(FoodConsumption).filter(
+        FoodConsumption.food_id == food_id
+    )
+    days = {
+        (user_id, consumption_date)
+        for user_id, consumption_date in food_consumptions.with_entities(
+            FoodConsumption.user_id, FoodConsumption.consumption_date
+        ).distinct()
+    }
+    food_consumptions.delete(synchronize_session=False)
     db.delete(food_db)
+    db.flush()
+    rebuild_daily_summaries(db, days=days)
     db.commit()
 
+    if food_db.user_id is None:
+        catalog_cache.invalidate()
+
     return {"message": "Food deleted successfully"}
 
 
 @router.get("/{food_id}/serving-sizes", response_model=List[ServingSizeRead])
 def get_serving_sizes_by_food_id(
     food_id: int,
+    request: Request,
+    response: Response,
     current_user: UserRead = Depends(get_current_user),
+    catalog: Catalog = Depends(get_catalog),
     db: Session = Depends(get_db),
 ):
-    food_db = db.query(Food).filter(Food.id == food_id).first()
-
-    if not food_db:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Food not found"
-        )
-
-    return food_db.serving_sizes
+    return get_cached_food(food_id, catalog, db, request, response).serving_sizes
@@ -1,12 +1,21 @@
-from typing import List
+from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.dependencies.auth import get_current_user
+from app.dependencies.auth import get_current_user, get_list_user_id
 from app.dependencies.database import get_db
-from app.models import Meal
-from app.schemas import MealCreate, MealRead, MealUpdate, SimpleResultMessage, UserRead
+from app.models import FoodConsumption, Meal
+from app.pagination import PageParams, get_page_params, paginate
+from app.schemas import (
+    MealCreate,
+    MealRead,
+    MealUpdate,
+    Page,
+    SimpleResultMessage,
+    UserRead,
+)
+from app.summaries import rebuild_daily_summaries
 
 router = APIRouter(
     prefix="/meals",
@@ -15,11 +24,18 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=List[MealRead])
+@router.get("/", response_model=Page[MealRead])
 def get_meals(
-    current_user: UserRead = Depends(get_current_user), db: Session = Depends(get_db)
+    page: PageParams = Depends(get_page_params),
+    user_id: Optional[int] = Depends(get_list_user_id),
+    db: Session = Depends(get_db),
 ):
-    return db.query(Meal).all()
+    query = db.query(Meal)
+
+    if user_id is not None:
+        query = query.filter(Meal.user_id == user_id)
+
+    return paginate(query, page)
 
 
 @router.get("/{meal_id}", response_model=MealRead)
@@ -99,7 +115,22 @@ def delete_meal(
             status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to delete this meal"
         )
 
+    # The meal's food consumptions go with it, so the days they were logged
+    # on add up differently. They are deleted here rather than by the
+    # foreign key, which SQLite doesn't enforce
+    food_consumptions = db.query(FoodConsumption).filter(
+        FoodConsumption.meal_id == meal_id
+    )
+    days = {
+        (user_id, consumption_date)
+        for user_id, consumption_date in food_consumptions.with_entities(
+            FoodConsumption.user_id, FoodConsumption.consumption_date
+        ).distinct()
+    }
+    food_consumptions.delete(synchronize_session=False)
     db.delete(meal_db)
+    db.flush()
+    rebuild_daily_summaries(db, days=days)
     db.commit()
 
     return {"message": "Meal deleted successfully"}
@@ -1,12 +1,16 @@
-from typing import List
+from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.dependencies.auth import get_current_user
-from app.dependencies.database import get_db
+from app.controllers.user_controller import get_user_daily_report_prompt
+from app.dependencies.auth import get_current_user, get_list_user_id
+from app.dependencies.database import get_db, get_read_db
 from app.models import Report
+from app.pagination import PageParams, get_page_params, paginate
+from app.reports import get_or_generate_daily_report
 from app.schemas import (
+    Page,
     ReportCreate,
     ReportRead,
     SimpleResultMessage,
@@ -21,16 +25,22 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=List[ReportRead])
-async def get_reports(
-    current_user: UserRead = Depends(get_current_user),
+@router.get("/", response_model=Page[ReportRead])
+def get_reports(
+    page: PageParams = Depends(get_page_params),
+    user_id: Optional[int] = Depends(get_list_user_id),
     db: Session = Depends(get_db),
 ):
-    return db.query(Report).all()
+    query = db.query(Report)
+
+    if user_id is not None:
+        query = query.filter(Report.user_id == user_id)
+
+    return paginate(query, page)
 
 
 @router.get("/{report_id}", response_model=ReportRead)
-async def get_report_by_id(
+def get_report_by_id(
     report_id: int,
     current_user: UserRead = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -46,40 +56,22 @@ async def get_report_by_id(
 
 
 @router.post("/", response_model=ReportRead)
-async def create_report(
+def create_report(
     report: ReportCreate,
     current_user: UserRead = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    # The prompt is only read, and the report is saved through a writer
+    # session of its own, so the write lock isn't held while building it
+    db: Session = Depends(get_read_db),
 ):
-    report_db = db.query(Report).filter(Report.report_date == report.report_date).first()
-
-    if report_db and (
-        report_db.user_id != current_user.id and not current_user.is_admin
-    ):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You do not have permission to create or modify this report",
-        )
+    prompt = get_user_daily_report_prompt(report.report_date, current_user, db)
 
-    content = ""
-
-    # TODO: Build report content here
-
-    if report_db:
-        report_db.content = content
-    else:
-        report_db = Report(content=content, report_date=report.report_date, user_id=current_user.id)
-
-        db.add(report_db)
-
-    db.commit()
-    db.refresh(report_db)
-
-    return report_db
+    return get_or_generate_daily_report(
+        db, current_user.id, report.report_date, prompt
+    )
 
 
 @router.delete("/{report_id}", response_model=SimpleResultMessage)
-async def delete_report(
+def delete_report(
     report_id: int,
     current_user: UserRead = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -1,28 +1,48 @@
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
-from functools import reduce
 from typing import Any, Dict, List, Optional
 
 import bcrypt
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from jose import jwt
-from openai import OpenAI
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.constants import (
     ACCESS_TOKEN_EXPIRE_IN_MINUTES,
     ALGORITHM,
     DEFAULT_MEALS,
     ENCODING,
-    OPENAI_SYSTEM_PROMPT,
+    PASSWORD_HASHING_MAX_WORKERS,
     REFRESH_TOKEN_EXPIRE_DAYS,
+    REPORT_JOBS_KEEP_ALIVE_IN_SECONDS,
+    REPORT_JOBS_POLL_INTERVAL_IN_SECONDS,
+    REVALIDATE_CACHE_CONTROL,
     SECRET_KEY,
 )
-from app.dependencies.auth import get_current_user, verify_token
-from app.dependencies.database import get_db
-from app.enums import Goals
+from app.dependencies.auth import (
+    get_current_user,
+    token_revocation_list,
+    verify_token,
+)
+from app.dependencies.database import get_db, get_read_db
+from app.enums import ExportFormats, HistoryGranularities, ResponseViews
+from app.export import EXPORT_MEDIA_TYPES, stream_user_export
+from app.http_cache import check_etag, compute_daily_overview_etag
+from app.included import build_included
+from app.loaders import (
+    EXERCISE_LOG_READ_OPTIONS,
+    FOOD_CONSUMPTION_READ_OPTIONS,
+    FOOD_CONSUMPTION_SUMMARY_OPTIONS,
+    FOOD_READ_OPTIONS,
+)
 from app.models import (
+    DailySummary,
     User,
     Food,
     Meal,
@@ -30,26 +50,47 @@ from app.models import (
     Exercise,
     ExerciseLog,
     Report,
+    ReportJob,
     WaterIntake,
 )
+from app.nutrition import FoodConsumptionMacros
+from app.pagination import PageParams, get_page_params, paginate
+from app.report_jobs import report_job_queue
+from app.reports import (
+    build_daily_report_prompt,
+    compute_report_inputs_hash,
+    get_or_generate_daily_report,
+    get_stored_report,
+    stream_and_save_report,
+)
 from app.schemas import (
+    CompactList,
     ExerciseLogRead,
+    ExerciseLogSummary,
     ExerciseRead,
     FoodRead,
     FoodConsumptionRead,
+    FoodConsumptionSummary,
     MealCreate,
     MealRead,
+    Page,
     ReportRead,
     SimpleResultMessage,
     RefreshTokenRequest,
     RefreshTokenResponse,
+    ReportJobRead,
     TokenResponse,
+    UserBase,
     UserCreate,
     UserDailyOverview,
+    UserDailyOverviewCompact,
+    UserHistory,
     UserRead,
     UserUpdate,
     WaterIntakeRead,
 )
+from app.serialization import ResponseSerializer
+from app.summaries import get_daily_summary, get_history_buckets
 
 EXAMPLE_CONTENT = """
 Objetivo: Perder peso
@@ -65,7 +106,9 @@ Jantar: Salada de folhas verdes com tomate e 50g de queijo cottage
 Lanches: 1 maçã, 1 punhado de amêndoas (30g)
 """
 
-client = OpenAI()
+password_hashing_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASHING_MAX_WORKERS, thread_name_prefix="password-hashing"
+)
 
 router = APIRouter(
     prefix="/users",
@@ -77,46 +120,105 @@ router = APIRouter(
 def create_token(data: Dict[str, Any], expires_delta: timedelta) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + expires_delta
-    to_encode.update({"exp": expire})
+    # Issued at with sub-second precision, see TokenRevocationList
+    to_encode.update({"exp": expire, "iat": time.time()})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def create_access_token(data: Dict[str, Any]):
+def create_token_data(user: User) -> Dict[str, Any]:
+    # Tokens issued with an older version than the user's are revoked
+    return {"sub": user.email, "uid": user.id, "ver": user.token_version}
+
+
+def create_access_token(user: User) -> str:
+    data = create_token_data(user)
     data["type"] = "access"
+    # The user (physiology included) travels in the token, so requests can be
+    # authenticated without loading it, see get_token_user
+    data["usr"] = UserBase.model_validate(user, from_attributes=True).model_dump(
+        mode="json"
+    )
     return create_token(data, timedelta(minutes=ACCESS_TOKEN_EXPIRE_IN_MINUTES))
 
 
-def create_refresh_token(data: Dict[str, Any]) -> str:
+def create_refresh_token(user: User) -> str:
+    data = create_token_data(user)
     data["type"] = "refresh"
     return create_token(data, timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
 
 
+def revoke_user_tokens(user_db: User, revoke_refresh_tokens: bool = False) -> None:
+    """
+    This method will revoke the access tokens issued to the user so far,
+    e.g. because the user they carry changed. Refresh tokens, which are
+    checked against the database, are only revoked when asked to. Must be
+    called before committing
+    """
+    if revoke_refresh_tokens:
+        user_db.token_version += 1
+
+    token_revocation_list.revoke(user_db.id)
+
+
 def verify_password(plain_password: str, hashed_password: str):
     try:
-        return bcrypt.checkpw(plain_password.encode(ENCODING), hashed_password.encode(ENCODING))
+        return password_hashing_executor.submit(
+            bcrypt.checkpw,
+            plain_password.encode(ENCODING),
+            hashed_password.encode(ENCODING),
+        ).result()
     except ValueError:
         return False
 
 
 def get_password_hash(password: str):
-    return bcrypt.hashpw(password.encode(ENCODING), bcrypt.gensalt()).decode(ENCODING)
+    return (
+        password_hashing_executor.submit(
+            bcrypt.hashpw, password.encode(ENCODING), bcrypt.gensalt()
+        )
+        .result()
+        .decode(ENCODING)
+    )
+
+
+def hash_user_password(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    This method will replace the password of an update by its hash. Updates
+    hash it before touching the database, so a writer session doesn't hold
+    the write lock while bcrypt runs
+    """
+    if "password" in user_data:
+        user_data["hashed_password"] = get_password_hash(user_data.pop("password"))
+
+    return user_data
 
 
 @router.post("/refresh-token", response_model=RefreshTokenResponse)
-async def refresh_token(request: RefreshTokenRequest):
+def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_read_db)):
     payload = verify_token(request.refresh_token)
 
     if not payload or payload.get("type") != "refresh":
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token is invalid")
 
-    new_access_token = create_access_token(data={"sub": payload.get("sub")})
+    if "uid" in payload:
+        user_db = db.get(User, payload["uid"])
+    else:
+        # Tokens issued before the user id was embedded in the claims
+        user_db = db.query(User).filter(User.email == payload.get("sub")).first()
+
+    if not user_db or payload.get("ver", 0) != user_db.token_version:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token is invalid")
+
+    new_access_token = create_access_token(user_db)
 
     return {"access_token": new_access_token, "token_type": "bearer"}
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+def login(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    # Only reads, and must not hold the SQLite writer while checking the hash
+    db: Session = Depends(get_read_db),
 ):
     user_db = db.query(User).filter(User.email == form_data.username).first()
 
@@ -127,16 +229,28 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    token_data = {"sub": user_db.email}
-
-    access_token = create_access_token(token_data)
-    refresh_token = create_refresh_token(token_data)
+    access_token = create_access_token(user_db)
+    refresh_token = create_refresh_token(user_db)
 
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 
+@router.post("/logout", response_model=SimpleResultMessage)
+def logout(
+    current_user: UserRead = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    user_db = db.get(User, current_user.id)
+
+    if user_db:
+        revoke_user_tokens(user_db, revoke_refresh_tokens=True)
+        db.commit()
+
+    return {"message": "Logged out successfully"}
+
+
 @router.get("/me", response_model=UserRead)
-async def get_current_logged_user(
+def get_current_logged_user(
     current_user: UserRead = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -144,36 +258,51 @@ async def get_current_logged_user(
 
 
 @router.put("/me", response_model=UserRead)
-async def update_current_user(
+def update_current_user(
     user: UserUpdate,
     current_user: UserRead = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    for key, value in user.dict(exclude_unset=True).items():
-        if key == "password":
-            key = "hashed_password"
-            value = get_password_hash(value)
-        setattr(current_user, key, value)
+    user_data = hash_user_password(user.dict(exclude_unset=True))
+    user_db = db.get(User, current_user.id)
 
+    if not user_db:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+
+    for key, value in user_data.items():
+        setattr(user_db, key, value)
+
+    # The tokens carry the user, and a new password logs out every session
+    revoke_user_tokens(user_db, revoke_refresh_tokens="hashed_password" in user_data)
     db.commit()
-    db.refresh(current_user)
+    db.refresh(user_db)
 
-    return current_user
+    return user_db
 
 
 @router.delete("/me", response_model=SimpleResultMessage)
-async def delete_current_user(
+def delete_current_user(
     current_user: UserRead = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    db.delete(current_user)
+    user_db = db.get(User, current_user.id)
+
+    if not user_db:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+
+    revoke_user_tokens(user_db)
+    db.delete(user_db)
     db.commit()
 
     return {"message": "Current user deleted successfully"}
 
 
 @router.get("/me/exercises", response_model=List[ExerciseRead])
-async def get_user_exercises(
+def get_user_exercises(
     current_user: UserRead = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -181,15 +310,20 @@ async def get_user_exercises(
 
 
 @router.get("/me/foods", response_model=List[FoodRead])
-async def get_user_foods(
+def get_user_foods(
     current_user: UserRead = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    return db.query(Food).filter(Food.user_id == current_user.id).all()
+    return (
+        db.query(Food)
+        .options(*FOOD_READ_OPTIONS)
+        .filter(Food.user_id == current_user.id)
+        .all()
+    )
 
 
 @router.get("/me/meals", response_model=List[MealRead])
-async def get_user_meals(
+def get_user_meals(
     current_user: UserRead = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -197,29 +331,77 @@ async def get_user_meals(
 
 
 @router.get("/me/reports", response_model=List[ReportRead])
-async def get_user_reports(
+def get_user_reports(
     current_user: UserRead = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     return db.query(Report).filter(Report.user_id == current_user.id).all()
 
 
-@router.get("/me/exercise-logs", response_model=List[ExerciseLogRead])
-async def get_user_exercise_logs(
+def query_user_exercise_logs(db: Session, user_id: int, date: Optional[date]):
+    query = (
+        db.query(ExerciseLog)
+        .options(*EXERCISE_LOG_READ_OPTIONS)
+        .filter(ExerciseLog.user_id == user_id)
+    )
+
+    if date:
+        query = query.filter(ExerciseLog.practice_date == date)
+
+    return query
+
+
+def query_user_food_consumptions(
+    db: Session, user_id: int, date: Optional[date], view: ResponseViews
+):
+    query = (
+        db.query(FoodConsumption)
+        .options(
+            *(
+                FOOD_CONSUMPTION_SUMMARY_OPTIONS
+                if view == ResponseViews.COMPACT
+                else FOOD_CONSUMPTION_READ_OPTIONS
+            )
+        )
+        .filter(FoodConsumption.user_id == user_id)
+    )
+
+    if date:
+        query = query.filter(FoodConsumption.consumption_date == date)
+
+    return query
+
+
+EXERCISE_LOGS_SERIALIZER = ResponseSerializer(List[ExerciseLogRead])
+COMPACT_EXERCISE_LOGS_SERIALIZER = ResponseSerializer(CompactList[ExerciseLogSummary])
+
+
+@router.get(
+    "/me/exercise-logs",
+    response_model=List[ExerciseLogRead] | CompactList[ExerciseLogSummary],
+)
+def get_user_exercise_logs(
     date: Optional[date] = Query(None, description="Filter exercise logs by date"),
+    view: ResponseViews = Query(
+        ResponseViews.FULL,
+        description="Compact returns summaries and side-loads the exercises",
+    ),
     current_user: UserRead = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    query = db.query(ExerciseLog).filter(ExerciseLog.user_id == current_user.id)
+    exercise_logs = query_user_exercise_logs(db, current_user.id, date).all()
 
-    if date:
-        query = query.filter(ExerciseLog.practice_date == date)
+    if view == ResponseViews.COMPACT:
+        return COMPACT_EXERCISE_LOGS_SERIALIZER.response({
+            "items": exercise_logs,
+            "included": build_included(exercise_logs=exercise_logs),
+        })
 
-    return query.all()
+    return EXERCISE_LOGS_SERIALIZER.response(exercise_logs)
 
 
 @router.get("/me/water-intakes", response_model=List[WaterIntakeRead])
-async def get_user_water_intakes(
+def get_user_water_intakes(
     date: Optional[date] = Query(None, description="Filter water intakes by date"),
     current_user: UserRead = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -232,99 +414,284 @@ async def get_user_water_intakes(
     return query.all()
 
 
-@router.get("/me/food-consumptions", response_model=List[FoodConsumptionRead])
-async def get_user_food_consumptions(
+FOOD_CONSUMPTIONS_SERIALIZER = ResponseSerializer(List[FoodConsumptionRead])
+COMPACT_FOOD_CONSUMPTIONS_SERIALIZER = ResponseSerializer(
+    CompactList[FoodConsumptionSummary]
+)
+
+
+@router.get(
+    "/me/food-consumptions",
+    response_model=List[FoodConsumptionRead] | CompactList[FoodConsumptionSummary],
+)
+def get_user_food_consumptions(
     date: Optional[date] = Query(None, description="Filter food consumptions by date"),
+    view: ResponseViews = Query(
+        ResponseViews.FULL,
+        description=(
+            "Compact returns summaries and side-loads the foods, serving sizes "
+            "and meals"
+        ),
+    ),
     current_user: UserRead = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    query = db.query(FoodConsumption).filter(FoodConsumption.user_id == current_user.id)
+    food_consumptions = query_user_food_consumptions(
+        db, current_user.id, date, view
+    ).all()
+
+    if view == ResponseViews.COMPACT:
+        return COMPACT_FOOD_CONSUMPTIONS_SERIALIZER.response({
+            "items": food_consumptions,
+            "included": build_included(food_consumptions=food_consumptions),
+        })
+
+    return FOOD_CONSUMPTIONS_SERIALIZER.response(food_consumptions)
+
+
+def build_user_daily_overview(
+    date: date,
+    current_user: UserRead,
+    db: Session,
+    daily_summary: Optional[DailySummary],
+    view: ResponseViews = ResponseViews.FULL,
+) -> Dict[str, Any]:
+    food_consumptions = query_user_food_consumptions(
+        db, current_user.id, date, view
+    ).all()
+    water_intakes = get_user_water_intakes(date, current_user, db)
+    exercise_logs = query_user_exercise_logs(db, current_user.id, date).all()
+
+    macros = FoodConsumptionMacros.from_food_consumptions(food_consumptions)
+    meal_macros = macros.totals_by(
+        food_consumption.meal_id for food_consumption in food_consumptions
+    )
 
-    if date:
-        query = query.filter(FoodConsumption.consumption_date == date)
+    daily_overview = {
+        "total_calories_intake": daily_summary.calories_intake if daily_summary else 0,
+        "total_water_intake": float(
+            daily_summary.water_intake_in_mililiters if daily_summary else 0
+        ),
+        "total_calories_burned": daily_summary.calories_burned if daily_summary else 0,
+        "meal_totals": [
+            {"meal_id": meal_id, **meal_macros[meal_id]}
+            for meal_id in sorted(meal_macros)
+        ],
+        "food_consumptions": food_consumptions,
+        "water_intakes": water_intakes,
+        "exercise_logs": exercise_logs,
+    }
+
+    if view == ResponseViews.COMPACT:
+        daily_overview["included"] = build_included(food_consumptions, exercise_logs)
+
+    return daily_overview
 
-    return query.all()
 
+DAILY_OVERVIEW_SERIALIZERS = {
+    ResponseViews.FULL: ResponseSerializer(UserDailyOverview),
+    ResponseViews.COMPACT: ResponseSerializer(UserDailyOverviewCompact),
+}
 
-@router.get("/me/daily-overview", response_model=UserDailyOverview)
-async def get_user_daily_overview(
+
+@router.get(
+    "/me/daily-overview",
+    response_model=UserDailyOverview | UserDailyOverviewCompact,
+)
+def get_user_daily_overview(
+    request: Request,
+    response: Response,
     date: date = Query(description="Date to overview"),
+    view: ResponseViews = Query(
+        ResponseViews.FULL,
+        description=(
+            "Compact returns summaries of the logs and side-loads the foods, "
+            "serving sizes, meals and exercises"
+        ),
+    ),
     current_user: UserRead = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    food_consumptions = await get_user_food_consumptions(date, current_user, db)
-    water_intakes = await get_user_water_intakes(date, current_user, db)
-    exercise_logs = await get_user_exercise_logs(date, current_user, db)
-
-    total_calories_intake = reduce(
-        lambda total, fc: total + fc.calories,
-        food_consumptions,
-        0,
+    daily_summary = get_daily_summary(db, current_user.id, date)
+    daily_overview = build_user_daily_overview(
+        date, current_user, db, daily_summary, view
     )
-    total_water_intake = reduce(
-        lambda total, wi: total + wi.quantity_in_mililiters, water_intakes, 0.0
+
+    # The foods, meals and exercises of the day change without touching its
+    # summary, so a 304 still loads the logs, but skips encoding them
+    etag = compute_daily_overview_etag(
+        current_user.id,
+        date,
+        view,
+        daily_summary.updated_at if daily_summary else None,
+        daily_overview,
     )
-    total_calories_burned = reduce(
-        lambda total, el: total + el.calories_burned,
-        exercise_logs,
-        0,
+    check_etag(request, response, etag, REVALIDATE_CACHE_CONTROL)
+
+    return DAILY_OVERVIEW_SERIALIZERS[view].response(
+        daily_overview, headers=response.headers
+    )
+
+
+@router.get("/me/history", response_model=UserHistory)
+def get_user_history(
+    from_date: date = Query(alias="from", description="First day of the history"),
+    to_date: date = Query(alias="to", description="Last day of the history"),
+    granularity: HistoryGranularities = Query(
+        HistoryGranularities.DAY, description="Size of each history bucket"
+    ),
+    current_user: UserRead = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    if from_date > to_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The start date must not be after the end date",
+        )
+
+    buckets = get_history_buckets(
+        db,
+        current_user.id,
+        from_date,
+        to_date,
+        granularity,
+        current_user.goal_calories,
     )
 
     return {
-        "total_calories_intake": total_calories_intake,
-        "total_water_intake": total_water_intake,
-        "total_calories_burned": total_calories_burned,
-        "food_consumptions": food_consumptions,
-        "water_intakes": water_intakes,
-        "exercise_logs": exercise_logs,
+        "from_date": from_date,
+        "to_date": to_date,
+        "granularity": granularity,
+        "goal_calories": current_user.goal_calories,
+        "buckets": buckets,
     }
 
 
+@router.get("/me/export", response_class=StreamingResponse)
+def export_user_diary(
+    export_format: ExportFormats = Query(
+        ExportFormats.NDJSON, alias="format", description="Format of the export"
+    ),
+    current_user: UserRead = Depends(get_current_user),
+):
+    return StreamingResponse(
+        stream_user_export(current_user.id, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="nutritrack-export.{export_format.value}"'
+        },
+    )
+
+
+def get_user_daily_report_prompt(
+    date: date, current_user: UserRead, db: Session
+) -> str:
+    meals = get_user_meals(current_user, db)
+    daily_overview = build_user_daily_overview(
+        date, current_user, db, get_daily_summary(db, current_user.id, date)
+    )
+
+    return build_daily_report_prompt(current_user, meals, daily_overview, date)
+
+
 @router.get("/me/daily-report", response_model=None)
-async def get_user_daily_report(
+def get_user_daily_report(
+    date: date = Query(description="Date to overview"),
+    current_user: UserRead = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    prompt = get_user_daily_report_prompt(date, current_user, db)
+    report_db = get_or_generate_daily_report(db, current_user.id, date, prompt)
+
+    return {"generated_text": report_db.content}
+
+
+@router.get("/me/daily-report/stream", response_class=StreamingResponse)
+def stream_user_daily_report(
     date: date = Query(description="Date to overview"),
     current_user: UserRead = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    meals = await get_user_meals(current_user, db)
-    daily_overview = await get_user_daily_overview(date, current_user, db)
+    prompt = get_user_daily_report_prompt(date, current_user, db)
+    report_db = get_stored_report(db, current_user.id, date)
 
-    if current_user.goal_type is Goals.LOSE_WEIGHT:
-        prompt = 'Objetivo: Perder peso\n'
-    elif current_user.goal_type is Goals.MAINTAIN_WEIGHT:
-        prompt = 'Objetivo: Manter peso\n'
+    if report_db and report_db.inputs_hash == compute_report_inputs_hash(prompt):
+        chunks = iter([report_db.content])
     else:
-        prompt = 'Objetivo: Ganhar peso\n'
-    
-    prompt += f'TDEE (Total Daily Energy Expenditure): {current_user.tdee} kcal\n'
-    prompt += f'Calorias para atingir o objetivo: {current_user.goal_calories} kcal\n'
-    prompt += f'Data: {date.strftime(r"%d/%m/%Y")}\n'
-    prompt += f'Total de calorias ingeridas: {daily_overview["total_calories_intake"]} kcal\n'
-    prompt += f'Total de ingestão de água: {daily_overview["total_water_intake"]} ml\n'
-    prompt += f'Total de calorias queimadas: {daily_overview["total_calories_burned"]} kcal\n\n'
-
-    # TODO: Colocar as refeições no prompt
-    for meal in meals:
-        prompt += f"{meal.name}:\n"
-        for food_consumption in filter(lambda fc: fc.meal.id == meal.id, daily_overview["food_consumptions"]):
-            prompt += f"    - Nome: {food_consumption.food.description} / Porção: {food_consumption.serving_size.name} / Quantidade: {food_consumption.quantity} / Calorias: {food_consumption.calories} kcal \n"
-        prompt += "\n"
-
-    print(prompt)
-
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": OPENAI_SYSTEM_PROMPT},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.5,
-        max_tokens=512,
+        chunks = stream_and_save_report(current_user.id, date, prompt)
+
+    def events():
+        for chunk in chunks:
+            yield f"event: token\ndata: {json.dumps({'text': chunk})}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
-    print(response.choices[0].message.content)
 
-    return {"generated_text": response.choices[0].message.content}
+@router.post(
+    "/me/daily-report",
+    response_model=ReportJobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def enqueue_user_daily_report(
+    date: date = Query(description="Date to overview"),
+    current_user: UserRead = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    prompt = await run_in_threadpool(get_user_daily_report_prompt, date, current_user, db)
+
+    return await report_job_queue.enqueue(current_user.id, date, prompt)
+
+
+async def get_user_report_job(
+    job_id: str, current_user: UserRead = Depends(get_current_user)
+) -> ReportJob:
+    job = await report_job_queue.get(job_id)
+
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Report job not found"
+        )
+
+    return job
+
+
+@router.get("/me/daily-report/jobs/{job_id}", response_model=ReportJobRead)
+async def get_user_daily_report_job(job: ReportJob = Depends(get_user_report_job)):
+    return job
+
+
+@router.get("/me/daily-report/jobs/{job_id}/events", response_class=StreamingResponse)
+async def stream_user_daily_report_job(job: ReportJob = Depends(get_user_report_job)):
+    def job_event(name: str, job: ReportJob) -> str:
+        data = ReportJobRead.model_validate(job).model_dump_json(by_alias=True)
+        return f"event: {name}\ndata: {data}\n\n"
+
+    async def events(job: ReportJob):
+        yield job_event("status", job)
+        sent_at = time.monotonic()
+
+        # The job may run in another worker, so it is read again until it
+        # finishes (or is discarded)
+        while not job.is_finished:
+            await report_job_queue.wait(job.id, REPORT_JOBS_POLL_INTERVAL_IN_SECONDS)
+
+            if not (job := await report_job_queue.get(job.id)):
+                return
+
+            if not job.is_finished and (
+                time.monotonic() - sent_at >= REPORT_JOBS_KEEP_ALIVE_IN_SECONDS
+            ):
+                yield ": keep-alive\n\n"
+                sent_at = time.monotonic()
+
+        yield job_event("result", job)
+
+    return StreamingResponse(events(job), media_type="text/event-stream")
 
 
 @router.get("/me/has-provided-physiology-information", response_model=Dict[str, bool])
@@ -335,7 +702,7 @@ async def check_physiology_information(
 
 
 @router.post("/", response_model=TokenResponse)
-async def create_user(user: UserCreate, db: Session = Depends(get_db)):
+def create_user(user: UserCreate, db: Session = Depends(get_db)):
     hashed_password = get_password_hash(user.password)
 
     user_db = User(name=user.name, email=user.email, hashed_password=hashed_password)
@@ -352,21 +719,21 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(user_db)
 
-    token_data = {"sub": user_db.email}
-
-    access_token = create_access_token(token_data)
-    refresh_token = create_refresh_token(token_data)
+    access_token = create_access_token(user_db)
+    refresh_token = create_refresh_token(user_db)
 
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 
-@router.get("/", response_model=List[UserRead])
-async def get_users(db: Session = Depends(get_db)):
-    return db.query(User).all()
+@router.get("/", response_model=Page[UserRead])
+def get_users(
+    page: PageParams = Depends(get_page_params), db: Session = Depends(get_db)
+):
+    return paginate(db.query(User), page)
 
 
 @router.get("/{user_id}", response_model=UserRead)
-async def get_user_by_id(user_id: int, db: Session = Depends(get_db)):
+def get_user_by_id(user_id: int, db: Session = Depends(get_db)):
     user_db = db.query(User).filter(User.id == user_id).first()
 
     if not user_db:
@@ -378,11 +745,12 @@ async def get_user_by_id(user_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/{user_id}", response_model=UserRead)
-async def update_user(
+def update_user(
     user_id: int,
     user: UserUpdate,
     db: Session = Depends(get_db),
 ):
+    user_data = hash_user_password(user.dict(exclude_unset=True))
     user_db = db.query(User).filter(User.id == user_id).first()
 
     if not user_db:
@@ -390,12 +758,10 @@ async def update_user(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
-    for key, value in user.dict(exclude_unset=True).items():
-        if key == "password":
-            key = "hashed_password"
-            value = get_password_hash(value)
+    for key, value in user_data.items():
         setattr(user_db, key, value)
 
+    revoke_user_tokens(user_db, revoke_refresh_tokens="hashed_password" in user_data)
     db.commit()
     db.refresh(user_db)
 
@@ -403,7 +769,7 @@ async def update_user(
 
 
 @router.delete("/{user_id}", response_model=SimpleResultMessage)
-async def delete_user(
+def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
 ):
@@ -414,6 +780,7 @@ async def delete_user(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
+    revoke_user_tokens(user_db)
     db.delete(user_db)
     db.commit()
 
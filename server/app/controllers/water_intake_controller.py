@@ -1,18 +1,29 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.dependencies.auth import get_current_user
+from app.bulk import insert_returning_ids
+from app.constants import MAX_BATCH_SIZE
+
+from app.dependencies.auth import get_current_user, get_list_user_id
 from app.dependencies.database import get_db
 from app.models import WaterIntake
+from app.pagination import PageParams, get_page_params, paginate
 from app.schemas import (
+    BatchCreateResult,
+    Page,
     SimpleResultMessage,
     UserRead,
     WaterIntakeCreate,
     WaterIntakeRead,
     WaterIntakeUpdate,
 )
+from app.summaries import (
+    apply_water_intake,
+    increment_daily_summaries,
+    water_intake_totals,
+)
 
 router = APIRouter(
     prefix="/water-intakes",
@@ -21,11 +32,18 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=List[WaterIntakeRead])
+@router.get("/", response_model=Page[WaterIntakeRead])
 def get_water_intakes(
-    current_user: UserRead = Depends(get_current_user), db: Session = Depends(get_db)
+    page: PageParams = Depends(get_page_params),
+    user_id: Optional[int] = Depends(get_list_user_id),
+    db: Session = Depends(get_db),
 ):
-    return db.query(WaterIntake).all()
+    query = db.query(WaterIntake)
+
+    if user_id is not None:
+        query = query.filter(WaterIntake.user_id == user_id)
+
+    return paginate(query, page)
 
 
 @router.get("/{water_intake_id}", response_model=WaterIntakeRead)
@@ -55,12 +73,36 @@ def create_water_intake(
     water_intake_db = WaterIntake(**water_intake.dict(), user_id=current_user.id)
 
     db.add(water_intake_db)
+    apply_water_intake(db, water_intake_db)
     db.commit()
     db.refresh(water_intake_db)
 
     return water_intake_db
 
 
+@router.post("/batch", response_model=BatchCreateResult)
+def create_water_intakes(
+    water_intakes: List[WaterIntakeCreate] = Body(
+        min_length=1, max_length=MAX_BATCH_SIZE
+    ),
+    current_user: UserRead = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    ids = insert_returning_ids(
+        db,
+        WaterIntake,
+        [{**item.dict(), "user_id": current_user.id} for item in water_intakes],
+    )
+    increment_daily_summaries(
+        db,
+        current_user.id,
+        ((item.intake_date, water_intake_totals(db, item)) for item in water_intakes),
+    )
+    db.commit()
+
+    return {"ids": ids}
+
+
 @router.put("/{water_intake_id}", response_model=WaterIntakeRead)
 def update_water_intake(
     water_intake_id: int,
@@ -84,9 +126,12 @@ def update_water_intake(
             status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to update this water intake"
         )
 
+    apply_water_intake(db, water_intake_db, sign=-1)
+
     for key, value in water_intake.dict(exclude_unset=True).items():
         setattr(water_intake_db, key, value)
 
+    apply_water_intake(db, water_intake_db)
     db.commit()
     db.refresh(water_intake_db)
 
@@ -113,6 +158,7 @@ def delete_water_intake(
             status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to delete this water intake"
         )
 
+    apply_water_intake(db, water_intake_db, sign=-1)
     db.delete(water_intake_db)
     db.commit()
 
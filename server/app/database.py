@@ -1,10 +1,168 @@
-from sqlalchemy import create_engine
+import os
+import sqlite3
+import threading
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./sqlite.db"
+# The engine is created on import, before app.main gets to load the .env file
+load_dotenv()
+
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL") or "sqlite:///./sqlite.db"
+
+# Connections kept open per process, plus the ones that may be opened on bursts
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE") or 5)
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW") or 10)
+DATABASE_POOL_TIMEOUT_IN_SECONDS = int(
+    os.getenv("DATABASE_POOL_TIMEOUT_IN_SECONDS") or 30
+)
+# Check connections on checkout, so the ones dropped by the server (restarts,
+# failovers, idle timeouts) are replaced instead of failing the request
+DATABASE_POOL_PRE_PING = (os.getenv("DATABASE_POOL_PRE_PING") or "true").lower() in (
+    "true",
+    "1",
+)
+DATABASE_POOL_RECYCLE_IN_SECONDS = int(
+    os.getenv("DATABASE_POOL_RECYCLE_IN_SECONDS") or 1800
+)
+# Zero disables the timeout
+DATABASE_STATEMENT_TIMEOUT_IN_MILLISECONDS = int(
+    os.getenv("DATABASE_STATEMENT_TIMEOUT_IN_MILLISECONDS") or 30000
+)
+
+# Opt-in SQLite profile for deployments that serve several clients from a
+# single database file, see setup_sqlite_production_mode
+DATABASE_SQLITE_PRODUCTION = (
+    os.getenv("DATABASE_SQLITE_PRODUCTION") or ""
+).lower() in ("true", "1")
+DATABASE_SQLITE_BUSY_TIMEOUT_IN_MILLISECONDS = int(
+    os.getenv("DATABASE_SQLITE_BUSY_TIMEOUT_IN_MILLISECONDS") or 5000
+)
+DATABASE_SQLITE_MMAP_SIZE_IN_BYTES = int(
+    os.getenv("DATABASE_SQLITE_MMAP_SIZE_IN_BYTES") or 256 * 1024 * 1024
+)
+DATABASE_SQLITE_CACHE_SIZE_IN_KIBIBYTES = int(
+    os.getenv("DATABASE_SQLITE_CACHE_SIZE_IN_KIBIBYTES") or 64 * 1024
+)
+
+def get_engine_options(database_url: str) -> dict:
+    """
+    This method will build the create_engine arguments for the database
+    backend. PostgreSQL gets a bounded queue pool and a server side statement
+    timeout, SQLite keeps its default pool (unless in production mode) and
+    only allows connections to be shared between the threads running the
+    sync handlers
+    """
+    url = make_url(database_url)
+
+    if url.get_backend_name() == "sqlite":
+        options = {"connect_args": {"check_same_thread": False}}
+
+        if DATABASE_SQLITE_PRODUCTION:
+            options["pool_size"] = DATABASE_POOL_SIZE
+            options["max_overflow"] = DATABASE_MAX_OVERFLOW
+            options["pool_timeout"] = DATABASE_POOL_TIMEOUT_IN_SECONDS
+
+        return options
+
+    options = {
+        "pool_size": DATABASE_POOL_SIZE,
+        "max_overflow": DATABASE_MAX_OVERFLOW,
+        "pool_timeout": DATABASE_POOL_TIMEOUT_IN_SECONDS,
+        "pool_pre_ping": DATABASE_POOL_PRE_PING,
+        "pool_recycle": DATABASE_POOL_RECYCLE_IN_SECONDS,
+    }
+
+    if url.get_backend_name() == "postgresql":
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={DATABASE_STATEMENT_TIMEOUT_IN_MILLISECONDS}"
+        }
+
+    return options
+
+
+# Serializes the write transactions of this process, see
+# setup_sqlite_production_mode
+sqlite_write_lock = threading.Lock()
+sqlite_write_lock_owner = None
+
+
+def setup_sqlite_production_mode(engine) -> None:
+    """
+    This method will tune the SQLite connections of the engine for
+    concurrent use. The database is switched to WAL, so readers don't block
+    the writer (and vice versa), with synchronous=NORMAL, a busy timeout and
+    larger mmap and page caches.
+
+    Transactions are begun explicitly: deferred for reads, which run
+    concurrently, and IMMEDIATE for the connections of the writer engine,
+    which take the write lock up front instead of failing with "database is
+    locked" when upgrading from a read. Writes of the same process are
+    queued on sqlite_write_lock, writes of other processes wait on the busy
+    timeout
+    """
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        # Let the begin listener emit BEGIN instead of the sqlite3 module
+        dbapi_connection.isolation_level = None
+
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(
+            f"PRAGMA busy_timeout={DATABASE_SQLITE_BUSY_TIMEOUT_IN_MILLISECONDS}"
+        )
+        cursor.execute(f"PRAGMA mmap_size={DATABASE_SQLITE_MMAP_SIZE_IN_BYTES}")
+        # Negative sizes are in KiB instead of pages
+        cursor.execute(f"PRAGMA cache_size=-{DATABASE_SQLITE_CACHE_SIZE_IN_KIBIBYTES}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def begin_transaction(connection):
+        global sqlite_write_lock_owner
+
+        if not connection.get_execution_options().get("sqlite_writer"):
+            connection.exec_driver_sql("BEGIN")
+            return
+
+        if not sqlite_write_lock.acquire(
+            timeout=DATABASE_SQLITE_BUSY_TIMEOUT_IN_MILLISECONDS / 1000
+        ):
+            raise sqlite3.OperationalError("database is locked")
+
+        try:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+        except BaseException:
+            sqlite_write_lock.release()
+            raise
+
+        sqlite_write_lock_owner = connection
+
+    @event.listens_for(engine, "commit")
+    @event.listens_for(engine, "rollback")
+    def release_write_lock(connection):
+        global sqlite_write_lock_owner
+
+        # Any writer waiting for the lock still waits on the database lock
+        # (through the busy timeout) until the transaction actually ends
+        if sqlite_write_lock_owner is connection:
+            sqlite_write_lock_owner = None
+            sqlite_write_lock.release()
+
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL, **get_engine_options(SQLALCHEMY_DATABASE_URL)
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if DATABASE_SQLITE_PRODUCTION and engine.dialect.name == "sqlite":
+    setup_sqlite_production_mode(engine)
+
+# Sessions of the writer engine begin their transactions ready to write. Only
+# the SQLite production mode tells them apart from the read sessions
+writer_engine = engine.execution_options(sqlite_writer=True)
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=writer_engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
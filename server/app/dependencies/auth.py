@@ -1,31 +1,96 @@
+import threading
+import time
 from datetime import datetime
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Dict, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
-from app.constants import ALGORITHM, SECRET_KEY
+from app.constants import (
+    ACCESS_TOKEN_EXPIRE_IN_MINUTES,
+    ALGORITHM,
+    SECRET_KEY,
+    TOKEN_CACHE_MAX_SIZE,
+)
 from app.dependencies.database import get_db
 from app.models import User
+from app.schemas import UserBase, UserRead
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 
-def verify_token(token: str) -> Dict[str, Any] | None:
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+class TokenRevocationList:
+    """
+    In-process record of the users whose access tokens issued until a given
+    moment must be rejected, e.g. after logging out, changing the password or
+    changing the profile the tokens carry.
+
+    Access tokens are verified without touching the database, so other
+    worker processes keep accepting them until they expire. Entries are
+    dropped once every token they could revoke has expired.
+    """
+
+    def __init__(self, retention_in_seconds: float):
+        self.retention_in_seconds = retention_in_seconds
+        self._revoked_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, user_id: int) -> None:
+        now = time.time()
+
+        with self._lock:
+            self._revoked_at[user_id] = now
+
+            for revoked_user_id, revoked_at in list(self._revoked_at.items()):
+                if revoked_at < now - self.retention_in_seconds:
+                    del self._revoked_at[revoked_user_id]
 
-        exp = payload.get("exp")
-        if exp and datetime.utcnow() >= datetime.utcfromtimestamp(exp):
-            return None
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        revoked_at = self._revoked_at.get(payload["uid"])
+        return revoked_at is not None and payload.get("iat", 0) <= revoked_at
 
-        return payload
+
+token_revocation_list = TokenRevocationList(ACCESS_TOKEN_EXPIRE_IN_MINUTES * 60)
+
+
+@lru_cache(maxsize=TOKEN_CACHE_MAX_SIZE)
+def decode_token(token: str) -> Dict[str, Any] | None:
+    # Memoized, so clients sending the same token over and over only pay for
+    # the signature check once. The payload must not be modified
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         return None
 
 
+def verify_token(token: str) -> Dict[str, Any] | None:
+    payload = decode_token(token)
+
+    if not payload:
+        return None
+
+    exp = payload.get("exp")
+    if exp and datetime.utcnow() >= datetime.utcfromtimestamp(exp):
+        return None
+
+    return payload
+
+
+@lru_cache(maxsize=TOKEN_CACHE_MAX_SIZE)
+def get_token_user(token: str) -> UserRead:
+    """
+    This method will build the user from the claims of a verified access
+    token, computing bmr, tdee and goal calories the same way the model does
+    """
+    payload = decode_token(token)
+    user = User(id=payload["uid"], **UserBase.model_validate(payload["usr"]).model_dump())
+
+    return UserRead.model_validate(user)
+
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -35,12 +100,49 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 
     payload = verify_token(token)
 
-    if not payload or not (email := payload.get("sub")):
+    if (
+        not payload
+        or payload.get("type") != "access"
+        or not (email := payload.get("sub"))
+    ):
         raise credentials_exception
 
+    if "uid" in payload:
+        if token_revocation_list.is_revoked(payload):
+            raise credentials_exception
+
+        return get_token_user(token)
+
+    # Compatibility with the access tokens issued before the user was
+    # embedded in the claims, which only carry its email. None is valid
+    # ACCESS_TOKEN_EXPIRE_IN_MINUTES after the release that embedded it, so
+    # this lookup (and the db dependency) can then be removed
     user_db = db.query(User).filter(User.email == email).first()
 
     if not user_db:
         raise credentials_exception
 
-    return user_db
+    return UserRead.model_validate(user_db)
+
+
+def get_list_user_id(
+    all_users: bool = Query(
+        False, alias="allUsers", description="List the items of every user (admins only)"
+    ),
+    current_user: UserRead = Depends(get_current_user),
+) -> Optional[int]:
+    """
+    This method will return the id of the user whose items a list endpoint
+    must return: the current user's, or None for every user when an admin
+    asks for all of them
+    """
+    if not all_users:
+        return current_user.id
+
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to list the items of every user",
+        )
+
+    return None
@@ -1,8 +1,25 @@
-from app.database import SessionLocal
+from fastapi import Request
 
+from app.database import ReadSessionLocal, SessionLocal
 
-def get_db():
-    db = SessionLocal()
+# Requests with these methods don't change data, their sessions only read
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def get_db(request: Request):
+    if request.method in READ_METHODS:
+        db = ReadSessionLocal()
+    else:
+        db = SessionLocal()
+
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db():
+    db = ReadSessionLocal()
     try:
         yield db
     finally:
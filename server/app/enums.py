@@ -18,3 +18,26 @@ class Goals(Enum):
     LOSE_WEIGHT = "lose_weight"
     MAINTAIN_WEIGHT = "maintain_weight"
     GAIN_WEIGHT = "gain_weight"
+
+
+class ReportJobStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class HistoryGranularities(Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class ExportFormats(Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class ResponseViews(Enum):
+    FULL = "full"
+    COMPACT = "compact"
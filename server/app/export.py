@@ -0,0 +1,203 @@
+import csv
+import io
+import json
+from typing import Any, Callable, Dict, Iterator
+
+from sqlalchemy.orm import Session
+
+from app.catalog import iter_batches
+from app.constants import EXPORT_BATCH_SIZE
+from app.database import ReadSessionLocal
+from app.enums import ExportFormats
+from app.models import (
+    Exercise,
+    ExerciseLog,
+    Food,
+    FoodConsumption,
+    Meal,
+    Report,
+    ServingSize,
+    WaterIntake,
+)
+from app.nutrition import FoodConsumptionMacros, compute_calories_burned
+
+# Columns of the CSV export. Every record fills the ones of its type and
+# leaves the others empty
+EXPORT_FIELDS = (
+    "type",
+    "id",
+    "date",
+    "meal",
+    "food",
+    "servingSize",
+    "quantity",
+    "calories",
+    "carbohydrates",
+    "proteins",
+    "lipids",
+    "quantityInMililiters",
+    "exercise",
+    "durationInHours",
+    "caloriesBurned",
+    "content",
+)
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormats.NDJSON: "application/x-ndjson",
+    ExportFormats.CSV: "text/csv",
+}
+
+
+def iter_food_consumption_records(db: Session, user_id: int) -> Iterator[Dict[str, Any]]:
+    rows = (
+        db.query(
+            FoodConsumption.id,
+            FoodConsumption.consumption_date,
+            Meal.name,
+            Food.description,
+            ServingSize.name,
+            FoodConsumption.quantity,
+            ServingSize.calories,
+            ServingSize.carbohydrates,
+            ServingSize.proteins,
+            ServingSize.lipids,
+        )
+        .join(Meal, FoodConsumption.meal_id == Meal.id)
+        .join(Food, FoodConsumption.food_id == Food.id)
+        .join(ServingSize, FoodConsumption.serving_size_id == ServingSize.id)
+        .filter(FoodConsumption.user_id == user_id)
+        .order_by(FoodConsumption.id)
+        .yield_per(EXPORT_BATCH_SIZE)
+    )
+
+    for batch in iter_batches(rows, EXPORT_BATCH_SIZE):
+        macros = FoodConsumptionMacros.from_rows([row[5:] for row in batch])
+
+        for row, row_macros in zip(batch, macros):
+            food_consumption_id, consumption_date, meal, food, serving_size, quantity = row[:6]
+            yield {
+                "type": "foodConsumption",
+                "id": food_consumption_id,
+                "date": consumption_date,
+                "meal": meal,
+                "food": food,
+                "servingSize": serving_size,
+                "quantity": quantity,
+                **row_macros,
+            }
+
+
+def iter_water_intake_records(db: Session, user_id: int) -> Iterator[Dict[str, Any]]:
+    rows = (
+        db.query(
+            WaterIntake.id,
+            WaterIntake.intake_date,
+            WaterIntake.quantity_in_mililiters,
+        )
+        .filter(WaterIntake.user_id == user_id)
+        .order_by(WaterIntake.id)
+        .yield_per(EXPORT_BATCH_SIZE)
+    )
+
+    for water_intake_id, intake_date, quantity_in_mililiters in rows:
+        yield {
+            "type": "waterIntake",
+            "id": water_intake_id,
+            "date": intake_date,
+            "quantityInMililiters": quantity_in_mililiters,
+        }
+
+
+def iter_exercise_log_records(db: Session, user_id: int) -> Iterator[Dict[str, Any]]:
+    rows = (
+        db.query(
+            ExerciseLog.id,
+            ExerciseLog.practice_date,
+            Exercise.name,
+            ExerciseLog.duration_in_hours,
+            Exercise.calories_per_hour,
+        )
+        .join(Exercise, ExerciseLog.exercise_id == Exercise.id)
+        .filter(ExerciseLog.user_id == user_id)
+        .order_by(ExerciseLog.id)
+        .yield_per(EXPORT_BATCH_SIZE)
+    )
+
+    for batch in iter_batches(rows, EXPORT_BATCH_SIZE):
+        calories_burned = compute_calories_burned(
+            (row.duration_in_hours for row in batch),
+            (row.calories_per_hour for row in batch),
+        )
+
+        for row, row_calories_burned in zip(batch, calories_burned):
+            yield {
+                "type": "exerciseLog",
+                "id": row.id,
+                "date": row.practice_date,
+                "exercise": row.name,
+                "durationInHours": row.duration_in_hours,
+                "caloriesBurned": row_calories_burned,
+            }
+
+
+def iter_report_records(db: Session, user_id: int) -> Iterator[Dict[str, Any]]:
+    rows = (
+        db.query(Report.id, Report.report_date, Report.content)
+        .filter(Report.user_id == user_id)
+        .order_by(Report.id)
+        .yield_per(EXPORT_BATCH_SIZE)
+    )
+
+    for report_id, report_date, content in rows:
+        yield {"type": "report", "id": report_id, "date": report_date, "content": content}
+
+
+def iter_export_records(db: Session, user_id: int) -> Iterator[Dict[str, Any]]:
+    yield from iter_food_consumption_records(db, user_id)
+    yield from iter_water_intake_records(db, user_id)
+    yield from iter_exercise_log_records(db, user_id)
+    yield from iter_report_records(db, user_id)
+
+
+def create_record_writer(
+    buffer: io.StringIO, export_format: ExportFormats
+) -> Callable[[Dict[str, Any]], None]:
+    if export_format is ExportFormats.CSV:
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        return writer.writerow
+
+    def write_json_line(record: Dict[str, Any]) -> None:
+        buffer.write(json.dumps(record, default=str, ensure_ascii=False))
+        buffer.write("\n")
+
+    return write_json_line
+
+
+def stream_user_export(user_id: int, export_format: ExportFormats) -> Iterator[str]:
+    """
+    This method will yield the user's whole diary (food consumptions, water
+    intakes, exercise logs and reports) serialized in the given format, in
+    chunks of EXPORT_BATCH_SIZE records.
+
+    Rows are read as plain tuples in batches (through a server side cursor
+    on PostgreSQL) and written out as they come, so memory use doesn't grow
+    with the size of the diary. The stream outlives the request's session,
+    so it reads through its own
+    """
+    db = ReadSessionLocal()
+    try:
+        buffer = io.StringIO()
+        write_record = create_record_writer(buffer, export_format)
+
+        for count, record in enumerate(iter_export_records(db, user_id), start=1):
+            write_record(record)
+
+            if count % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue()
+    finally:
+        db.close()
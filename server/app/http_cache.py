@@ -0,0 +1,114 @@
+import hashlib
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+from app.constants import ENCODING
+from app.enums import ResponseViews
+
+
+def compute_etag(*parts: Any) -> str:
+    """
+    This method will build a strong ETag out of the values a response is
+    made from (ids and updated_at timestamps, mostly), so it can be checked
+    before the response is even built
+    """
+    digest = hashlib.blake2b(repr(parts).encode(ENCODING), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def compute_food_etag(food) -> str:
+    """
+    Works for Food rows (with their current serving sizes loaded) as well
+    as for the FoodRecord of the catalog cache. Serving size ids are part of
+    it, so removing one changes it even when no timestamp moved forward
+    """
+    return compute_etag(
+        food.id,
+        food.updated_at,
+        [(serving_size.id, serving_size.updated_at) for serving_size in food.serving_sizes],
+    )
+
+
+def compute_daily_overview_etag(
+    user_id: int,
+    date: date,
+    view: ResponseViews,
+    daily_summary_updated_at: Optional[datetime],
+    daily_overview: Dict[str, Any],
+) -> str:
+    """
+    This method will tag a daily overview (see build_user_daily_overview)
+    with the updated_at of its summary and of everything it lists: the
+    day's logs and the foods, serving sizes, meals and exercises they
+    reference, which can change without touching the summary. The
+    relationships must have been loaded with the logs, and in the full view,
+    which lists the serving sizes of each food, those too
+    """
+
+    def food_part(food) -> Any:
+        if view == ResponseViews.FULL:
+            return compute_food_etag(food)
+        return (food.id, food.updated_at)
+
+    return compute_etag(
+        user_id,
+        date,
+        view.value,
+        daily_summary_updated_at,
+        [
+            (
+                food_consumption.id,
+                food_consumption.updated_at,
+                food_part(food_consumption.food),
+                food_consumption.serving_size.id,
+                food_consumption.serving_size.updated_at,
+                food_consumption.meal.id,
+                food_consumption.meal.updated_at,
+            )
+            for food_consumption in daily_overview["food_consumptions"]
+        ],
+        [
+            (water_intake.id, water_intake.updated_at)
+            for water_intake in daily_overview["water_intakes"]
+        ],
+        [
+            (
+                exercise_log.id,
+                exercise_log.updated_at,
+                exercise_log.exercise.id,
+                exercise_log.exercise.updated_at,
+            )
+            for exercise_log in daily_overview["exercise_logs"]
+        ],
+    )
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    # If-None-Match uses the weak comparison
+    return etag in (
+        tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+    )
+
+
+def check_etag(
+    request: Request, response: Response, etag: str, cache_control: str
+) -> None:
+    """
+    This method will answer the request with a bodiless 304 when the client
+    already has the representation tagged `etag`, and otherwise add the
+    caching headers to the response about to be built
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
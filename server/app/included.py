@@ -0,0 +1,33 @@
+from typing import Any, Dict, Iterable
+
+from app.models import ExerciseLog, FoodConsumption
+
+
+def build_included(
+    food_consumptions: Iterable[FoodConsumption] = (),
+    exercise_logs: Iterable[ExerciseLog] = (),
+) -> Dict[str, Dict[int, Any]]:
+    """
+    This method will collect the foods, serving sizes, meals and exercises
+    referenced by the logs of a compact response (see IncludedResources),
+    which must have been loaded with their relationships
+    """
+    foods = {}
+    serving_sizes = {}
+    meals = {}
+    exercises = {}
+
+    for food_consumption in food_consumptions:
+        foods[food_consumption.food_id] = food_consumption.food
+        serving_sizes[food_consumption.serving_size_id] = food_consumption.serving_size
+        meals[food_consumption.meal_id] = food_consumption.meal
+
+    for exercise_log in exercise_logs:
+        exercises[exercise_log.exercise_id] = exercise_log.exercise
+
+    return {
+        "foods": foods,
+        "serving_sizes": serving_sizes,
+        "meals": meals,
+        "exercises": exercises,
+    }
@@ -0,0 +1,32 @@
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models import ExerciseLog, Food, FoodConsumption, ServingSize
+
+# Eager loading profiles for the read schemas with nested relationships, so
+# list endpoints issue a fixed number of queries regardless of row count
+
+# Serving sizes soft deleted by the catalog sync aren't listed, but stay
+# loadable through the consumptions pointing to them
+CURRENT_SERVING_SIZES = Food.serving_sizes.and_(ServingSize.deleted_at.is_(None))
+
+# FoodRead
+FOOD_READ_OPTIONS = (selectinload(CURRENT_SERVING_SIZES),)
+
+# FoodConsumptionRead, including the serving size used by the macro properties
+FOOD_CONSUMPTION_READ_OPTIONS = (
+    joinedload(FoodConsumption.food).selectinload(CURRENT_SERVING_SIZES),
+    joinedload(FoodConsumption.meal),
+    joinedload(FoodConsumption.serving_size),
+)
+
+# FoodConsumptionSummary and the food, meal and serving size it references,
+# which are side-loaded, so the serving sizes of the food aren't needed
+FOOD_CONSUMPTION_SUMMARY_OPTIONS = (
+    joinedload(FoodConsumption.food),
+    joinedload(FoodConsumption.meal),
+    joinedload(FoodConsumption.serving_size),
+)
+
+# ExerciseLogRead and ExerciseLogSummary, including the exercise used by
+# calories_burned (which the summary side-loads)
+EXERCISE_LOG_READ_OPTIONS = (joinedload(ExerciseLog.exercise),)
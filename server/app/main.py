@@ -3,7 +3,15 @@ import os
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
+from app.catalog_cache import warm_catalog_cache
+from app.compression import CompressionMiddleware
+from app.constants import (
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MINIMUM_SIZE,
+)
 from app.controllers.exercise_controller import router as exercise_router
 from app.controllers.exercise_log_controller import router as exercise_log_router
 from app.controllers.food_consumption_controller import (
@@ -18,7 +26,11 @@ from app.utils import populate_database
 
 load_dotenv()
 
-app = FastAPI(title="NutriTrack Server", version="2.0.0")
+app = FastAPI(
+    title="NutriTrack Server",
+    version="2.0.0",
+    default_response_class=ORJSONResponse,
+)
 
 origins = [
     "http://localhost",
@@ -33,6 +45,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MINIMUM_SIZE,
+    gzip_level=COMPRESSION_GZIP_LEVEL,
+    brotli_quality=COMPRESSION_BROTLI_QUALITY,
+)
+
 app.include_router(exercise_router)
 app.include_router(exercise_log_router)
 app.include_router(food_router)
@@ -52,3 +71,5 @@ async def root():
 async def startup_event():
     if os.getenv("NUTRITRACK_POPULATE_DATABASE", "").lower() in ("true", "1"):
         populate_database()
+
+    warm_catalog_cache()
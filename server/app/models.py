@@ -1,11 +1,19 @@
 from datetime import datetime
 from typing import List
 
-from sqlalchemy import Date, DateTime, Enum, ForeignKey, Time
+from sqlalchemy import (
+    Date,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Time,
+    UniqueConstraint,
+    text,
+)
 from sqlalchemy.orm import Mapped, declarative_base, mapped_column, relationship
 
-from app.database import engine
-from app.enums import ActivityLevels, Genders, Goals
+from app.enums import ActivityLevels, Genders, Goals, ReportJobStatus
 from app.utils import calculate_bmr, calculate_goal_calories, calculate_tdee
 
 Base = declarative_base()
@@ -18,6 +26,11 @@ class TimestampMixin:
     )
 
 
+class SoftDeleteMixin:
+    # Set instead of deleting rows that other rows may still point to
+    deleted_at = mapped_column(DateTime, nullable=True)
+
+
 class FoodComponentsMixin:
     calories: Mapped[float] = mapped_column(nullable=True, default=0.0)
     carbohydrates: Mapped[float] = mapped_column(nullable=True, default=0.0)
@@ -33,6 +46,10 @@ class User(TimestampMixin, Base):
     email: Mapped[str] = mapped_column(unique=True, nullable=False, index=True)
     hashed_password: Mapped[str] = mapped_column(nullable=False)
     is_admin: Mapped[bool] = mapped_column(default=False)
+    # Bumped to revoke every token issued to the user, see create_token
+    token_version: Mapped[int] = mapped_column(
+        nullable=False, default=0, server_default="0"
+    )
 
     # Calculate BMR using Mifflin-St Jeor Equation
     gender: Mapped[Genders] = mapped_column(Enum(Genders), nullable=True)
@@ -59,12 +76,18 @@ class User(TimestampMixin, Base):
     reports: Mapped[List["Report"]] = relationship(
         back_populates="user", cascade="all, delete-orphan"
     )
+    report_jobs: Mapped[List["ReportJob"]] = relationship(
+        back_populates="user", cascade="all, delete-orphan"
+    )
     exercises: Mapped[List["Exercise"]] = relationship(
         back_populates="user", cascade="all, delete-orphan"
     )
     exercise_logs: Mapped[List["ExerciseLog"]] = relationship(
         back_populates="user", cascade="all, delete-orphan"
     )
+    daily_summaries: Mapped[List["DailySummary"]] = relationship(
+        back_populates="user", cascade="all, delete-orphan"
+    )
 
     @property
     def bmr(self) -> int:
@@ -98,6 +121,8 @@ class User(TimestampMixin, Base):
 
 class Meal(TimestampMixin, Base):
     __tablename__ = "meals"
+    # Lists of the user's items are paginated by id
+    __table_args__ = (Index("ix_meals_user_id_id", "user_id", "id"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(nullable=False)
@@ -112,14 +137,16 @@ class Meal(TimestampMixin, Base):
         )
 
 
-class Food(TimestampMixin, FoodComponentsMixin, Base):
+class Food(TimestampMixin, SoftDeleteMixin, FoodComponentsMixin, Base):
     __tablename__ = "foods"
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(nullable=False)
     description: Mapped[str] = mapped_column(nullable=False, index=True)
+    # Hash of the catalog item the food was synced from, see app.catalog
+    content_hash: Mapped[str] = mapped_column(nullable=True)
 
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
     user: Mapped["User"] = relationship(back_populates="foods")
 
     serving_sizes: Mapped[List["ServingSize"]] = relationship(
@@ -130,7 +157,7 @@ class Food(TimestampMixin, FoodComponentsMixin, Base):
         return f"<Food id={self.id} name={self.name} calories={self.calories} carbohydrates={self.carbohydrates} proteins={self.proteins} lipids={self.lipids}>"
 
 
-class ServingSize(TimestampMixin, FoodComponentsMixin, Base):
+class ServingSize(TimestampMixin, SoftDeleteMixin, FoodComponentsMixin, Base):
     __tablename__ = "serving_sizes"
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -145,6 +172,10 @@ class ServingSize(TimestampMixin, FoodComponentsMixin, Base):
 
 class WaterIntake(TimestampMixin, Base):
     __tablename__ = "water_intakes"
+    __table_args__ = (
+        Index("ix_water_intakes_user_id_intake_date", "user_id", "intake_date"),
+        Index("ix_water_intakes_user_id_id", "user_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     quantity_in_mililiters: Mapped[int] = mapped_column(nullable=False)
@@ -164,7 +195,7 @@ class Exercise(TimestampMixin, Base):
     name: Mapped[str] = mapped_column(nullable=False)
     calories_per_hour: Mapped[int] = mapped_column(nullable=False)
 
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
     user: Mapped["User"] = relationship(back_populates="exercises")
 
     exercise_logs: Mapped[List["ExerciseLog"]] = relationship(back_populates="exercise")
@@ -175,10 +206,16 @@ class Exercise(TimestampMixin, Base):
 
 class Report(TimestampMixin, Base):
     __tablename__ = "reports"
+    __table_args__ = (
+        UniqueConstraint("user_id", "report_date", name="uq_reports_user_id_report_date"),
+        Index("ix_reports_user_id_id", "user_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     content: Mapped[str] = mapped_column(nullable=False)
-    report_date = mapped_column(Date, nullable=False, unique=True, index=True)
+    report_date = mapped_column(Date, nullable=False, index=True)
+    # Hash of the inputs the content was generated from, see app.reports
+    inputs_hash: Mapped[str] = mapped_column(nullable=True)
 
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
     user: Mapped["User"] = relationship(back_populates="reports")
@@ -187,12 +224,63 @@ class Report(TimestampMixin, Base):
         return f"<Report id={self.id} content={self.content} report_date={self.report_date}>"
 
 
+# Jobs still generating their report, see ReportJob
+REPORT_JOB_IN_FLIGHT = text("status IN ('PENDING', 'RUNNING')")
+
+
+class ReportJob(TimestampMixin, Base):
+    """
+    Daily report generated in the background by app.report_jobs. Jobs are
+    stored rather than kept in memory, so any worker can answer the polls
+    of a job another one runs
+    """
+
+    __tablename__ = "report_jobs"
+    __table_args__ = (
+        # A single job in flight per user, day and inputs, across workers
+        Index(
+            "uq_report_jobs_in_flight",
+            "user_id",
+            "report_date",
+            "inputs_hash",
+            unique=True,
+            postgresql_where=REPORT_JOB_IN_FLIGHT,
+            sqlite_where=REPORT_JOB_IN_FLIGHT,
+        ),
+    )
+
+    id: Mapped[str] = mapped_column(primary_key=True)
+    report_date = mapped_column(Date, nullable=False)
+    inputs_hash: Mapped[str] = mapped_column(nullable=False)
+    status: Mapped[ReportJobStatus] = mapped_column(
+        Enum(ReportJobStatus), nullable=False, default=ReportJobStatus.PENDING
+    )
+    attempts: Mapped[int] = mapped_column(nullable=False, default=0)
+    content: Mapped[str] = mapped_column(nullable=True)
+    error: Mapped[str] = mapped_column(nullable=True)
+    finished_at = mapped_column(DateTime, nullable=True)
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    user: Mapped["User"] = relationship(back_populates="report_jobs")
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (ReportJobStatus.COMPLETED, ReportJobStatus.FAILED)
+
+    def __repr__(self) -> str:
+        return f"<ReportJob id={self.id} user_id={self.user_id} report_date={self.report_date} status={self.status}>"
+
+
 class ExerciseLog(TimestampMixin, Base):
     """
     Represents the many-to-many relationship between users and exercises
     """
 
     __tablename__ = "exercise_logs"
+    __table_args__ = (
+        Index("ix_exercise_logs_user_id_practice_date", "user_id", "practice_date"),
+        Index("ix_exercise_logs_user_id_id", "user_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     duration_in_hours: Mapped[float] = mapped_column(nullable=False)
@@ -214,6 +302,10 @@ class ExerciseLog(TimestampMixin, Base):
 
 class FoodConsumption(TimestampMixin, Base):
     __tablename__ = "food_consuptions"
+    __table_args__ = (
+        Index("ix_food_consuptions_user_id_consumption_date", "user_id", "consumption_date"),
+        Index("ix_food_consuptions_user_id_id", "user_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     quantity: Mapped[float] = mapped_column(nullable=False)
@@ -249,4 +341,31 @@ class FoodConsumption(TimestampMixin, Base):
         return f"<FoodConsumption id={self.id} food_name={self.food.name} calories={self.calories}>"
 
 
-Base.metadata.create_all(bind=engine)
+class DailySummary(TimestampMixin, Base):
+    """
+    Per user and day totals of the food consumption, water intake and
+    exercise logs, kept up to date by app.summaries whenever a log changes
+    """
+
+    __tablename__ = "daily_summaries"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "summary_date", name="uq_daily_summaries_user_id_summary_date"
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    summary_date = mapped_column(Date, nullable=False)
+    calories_intake: Mapped[int] = mapped_column(nullable=False, default=0)
+    carbohydrates: Mapped[int] = mapped_column(nullable=False, default=0)
+    proteins: Mapped[int] = mapped_column(nullable=False, default=0)
+    lipids: Mapped[int] = mapped_column(nullable=False, default=0)
+    water_intake_in_mililiters: Mapped[int] = mapped_column(nullable=False, default=0)
+    calories_burned: Mapped[int] = mapped_column(nullable=False, default=0)
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    user: Mapped["User"] = relationship(back_populates="daily_summaries")
+
+    def __repr__(self) -> str:
+        return f"<DailySummary id={self.id} user_id={self.user_id} summary_date={self.summary_date} calories_intake={self.calories_intake}>"
+
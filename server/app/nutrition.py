@@ -0,0 +1,166 @@
+import operator
+from array import array
+from typing import Dict, Hashable, Iterable, Iterator, List, Sequence
+
+from app.models import FoodConsumption
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, columns are computed with array without it
+    numpy = None
+
+# Macros of a food consumption, computed from the serving size nutrients of
+# the same names
+FOOD_CONSUMPTION_MACROS = ("calories", "carbohydrates", "proteins", "lipids")
+
+
+def to_column(values: Iterable[float]):
+    """
+    This method will load the values as a column of doubles, a numpy array
+    when numpy is installed. A missing value fails with a TypeError, like
+    the FoodConsumption and ExerciseLog properties do
+    """
+    column = array("d", values)
+
+    if numpy is None:
+        return column
+    return numpy.frombuffer(column, dtype=numpy.float64)
+
+
+def to_list(column) -> List[int]:
+    if numpy is None:
+        return column
+    return column.tolist()
+
+
+def round_products(values, factors):
+    """
+    This method will compute round(value * factor) for every pair of the
+    columns of doubles, as the FoodConsumption and ExerciseLog properties do
+    one log at a time. The columns hold the same doubles as the rows, so the
+    products are identical, and both numpy.rint and round() round half to
+    even.
+
+    Without numpy, float.__round__ is mapped over the products and the
+    results are kept in a list, since boxing them back into an array costs
+    more than computing them
+    """
+    if numpy is None:
+        return list(map(float.__round__, map(operator.mul, values, factors)))
+    return numpy.rint(values * factors).astype(numpy.int64)
+
+
+def sum_by(keys: Iterable[Hashable], values: Iterable[int]) -> Dict[Hashable, int]:
+    totals = {}
+
+    for key, value in zip(keys, values):
+        totals[key] = totals.get(key, 0) + value
+
+    return totals
+
+
+def compute_calories_burned(
+    durations_in_hours: Iterable[float], calories_per_hour: Iterable[int]
+) -> List[int]:
+    return to_list(
+        round_products(to_column(durations_in_hours), to_column(calories_per_hour))
+    )
+
+
+class FoodConsumptionMacros:
+    """
+    Macros of a batch of food consumptions. Their quantities and the
+    nutrients of their serving sizes are loaded as columns of doubles, and
+    each macro is computed for the whole column at once
+    """
+
+    __slots__ = ("columns",)
+
+    def __init__(
+        self, quantities: Iterable[float], nutrients: Dict[str, Iterable[float]]
+    ):
+        quantities = to_column(quantities)
+
+        self.columns = {
+            macro: round_products(to_column(nutrients[macro]), quantities)
+            for macro in FOOD_CONSUMPTION_MACROS
+        }
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[float]]) -> "FoodConsumptionMacros":
+        """
+        Rows are (quantity, calories, carbohydrates, proteins, lipids) tuples
+        """
+        quantities, *nutrients = (
+            map(operator.itemgetter(index), rows) for index in range(5)
+        )
+
+        return cls(quantities, dict(zip(FOOD_CONSUMPTION_MACROS, nutrients)))
+
+    @classmethod
+    def from_food_consumptions(
+        cls, food_consumptions: Sequence[FoodConsumption]
+    ) -> "FoodConsumptionMacros":
+        """
+        The food consumptions must have been loaded with their serving size
+        """
+        serving_sizes = [
+            food_consumption.serving_size for food_consumption in food_consumptions
+        ]
+
+        return cls(
+            (food_consumption.quantity for food_consumption in food_consumptions),
+            {
+                macro: [getattr(serving_size, macro) for serving_size in serving_sizes]
+                for macro in FOOD_CONSUMPTION_MACROS
+            },
+        )
+
+    def __len__(self) -> int:
+        return len(self.columns["calories"])
+
+    def __iter__(self) -> Iterator[Dict[str, int]]:
+        """
+        Yields the macros of each food consumption, in the batch's order
+        """
+        for values in zip(*map(to_list, self.columns.values())):
+            yield dict(zip(FOOD_CONSUMPTION_MACROS, values))
+
+    def column(self, macro: str) -> List[int]:
+        return to_list(self.columns[macro])
+
+    def totals(self) -> Dict[str, int]:
+        return {macro: int(sum(column)) for macro, column in self.columns.items()}
+
+    def totals_by(self, keys: Iterable[Hashable]) -> Dict[Hashable, Dict[str, int]]:
+        """
+        This method will add up the macros of the food consumptions sharing
+        a key (their meal, their day), in a single pass over the columns
+        """
+        positions: Dict[Hashable, int] = {}
+        codes = [positions.setdefault(key, len(positions)) for key in keys]
+
+        if numpy is not None:
+            # The sums are of integers, which doubles hold exactly
+            columns = [
+                numpy.bincount(
+                    numpy.asarray(codes, dtype=numpy.intp),
+                    weights=column,
+                    minlength=len(positions),
+                )
+                .astype(numpy.int64)
+                .tolist()
+                for column in self.columns.values()
+            ]
+        else:
+            columns = []
+            for column in self.columns.values():
+                totals = [0] * len(positions)
+                for code, value in zip(codes, column):
+                    totals[code] += value
+                columns.append(totals)
+
+        return {
+            key: dict(zip(FOOD_CONSUMPTION_MACROS, values))
+            for key, values in zip(positions, zip(*columns))
+        }
@@ -0,0 +1,81 @@
+import base64
+import binascii
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy.orm import Query as SQLAlchemyQuery
+
+from app.constants import DEFAULT_PAGE_LIMIT, ENCODING, MAX_PAGE_LIMIT
+
+
+@dataclass
+class PageParams:
+    limit: int
+    # Position decoded from the `after` cursor, None on the first page
+    after: Optional[int]
+
+
+def encode_cursor(position: int) -> str:
+    return base64.urlsafe_b64encode(str(position).encode(ENCODING)).decode(ENCODING)
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        position = int(base64.urlsafe_b64decode(cursor.encode(ENCODING)))
+    except (binascii.Error, ValueError):
+        position = None
+
+    # Cursors are encoded ids or search offsets, which are never negative
+    if position is None or position < 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+    return position
+
+
+def get_page_params(
+    limit: int = Query(
+        DEFAULT_PAGE_LIMIT,
+        ge=1,
+        le=MAX_PAGE_LIMIT,
+        description="Maximum number of items in the page",
+    ),
+    after: Optional[str] = Query(
+        None, description="The nextAfter cursor of the previous page"
+    ),
+) -> PageParams:
+    return PageParams(
+        limit=limit, after=decode_cursor(after) if after is not None else None
+    )
+
+
+def build_page(items: List[Any], page: PageParams, next_position) -> Dict[str, Any]:
+    """
+    This method will build the page envelope from up to `page.limit + 1`
+    items, the extra one only telling that there is a next page. The cursor
+    of the next page is `next_position` of the last item returned
+    """
+    if len(items) <= page.limit:
+        return {"items": items, "next_after": None}
+
+    items = items[: page.limit]
+
+    return {"items": items, "next_after": encode_cursor(next_position(items[-1]))}
+
+
+def paginate(query: SQLAlchemyQuery, page: PageParams) -> Dict[str, Any]:
+    """
+    This method will fetch a page of the query with keyset pagination on the
+    id of its entity: items are sorted by id and the cursor is the last id
+    returned, so every page is an index range scan however deep it is
+    """
+    id_column = query.column_descriptions[0]["entity"].id
+
+    if page.after is not None:
+        query = query.filter(id_column > page.after)
+
+    items = query.order_by(id_column).limit(page.limit + 1).all()
+
+    return build_page(items, page, lambda item: item.id)
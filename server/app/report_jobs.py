@@ -0,0 +1,288 @@
+import asyncio
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.constants import (
+    REPORT_JOBS_HEARTBEAT_INTERVAL_IN_SECONDS,
+    REPORT_JOBS_MAX_ATTEMPTS,
+    REPORT_JOBS_MAX_CONCURRENCY,
+    REPORT_JOBS_RETENTION_IN_MINUTES,
+    REPORT_JOBS_RETRY_BACKOFF_IN_SECONDS,
+    REPORT_JOBS_STALE_AFTER_IN_MINUTES,
+)
+from app.database import ReadSessionLocal, SessionLocal
+from app.enums import ReportJobStatus
+from app.models import ReportJob
+from app.reports import compute_report_inputs_hash, get_or_generate_daily_report
+
+IN_FLIGHT_STATUSES = (ReportJobStatus.PENDING, ReportJobStatus.RUNNING)
+
+
+def generate_report(user_id: int, report_date: date, prompt: str) -> str:
+    db = ReadSessionLocal()
+    try:
+        return get_or_generate_daily_report(db, user_id, report_date, prompt).content
+    finally:
+        db.close()
+
+
+def get_report_job(job_id: str) -> ReportJob | None:
+    db = ReadSessionLocal()
+    try:
+        return db.get(ReportJob, job_id)
+    finally:
+        db.close()
+
+
+def update_report_job(job_id: str, values: Dict[str, Any]) -> None:
+    """
+    This method will write the progress of a job. Every write moves its
+    updated_at forward, which tells the job still has a worker
+    """
+    db = SessionLocal()
+    try:
+        db.query(ReportJob).filter(ReportJob.id == job_id).update(
+            values, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def find_report_job(
+    db: Session, user_id: int, report_date: date, inputs_hash: str
+) -> ReportJob | None:
+    """
+    This method will return the job in flight for the given inputs or, when
+    there is none, the latest one that finished
+    """
+    return (
+        db.query(ReportJob)
+        .filter(
+            ReportJob.user_id == user_id,
+            ReportJob.report_date == report_date,
+            ReportJob.inputs_hash == inputs_hash,
+        )
+        .order_by(ReportJob.finished_at.is_not(None), ReportJob.created_at.desc())
+        .first()
+    )
+
+
+def create_report_job(
+    user_id: int,
+    report_date: date,
+    inputs_hash: str,
+    retention: timedelta,
+    stale_after: timedelta,
+) -> Tuple[ReportJob, bool]:
+    """
+    This method will store a pending job for the given inputs, unless one
+    is already in flight in any worker, which is returned instead. Returns
+    the job and whether it was created.
+
+    Jobs finished for longer than `retention` are discarded, and jobs in
+    flight without any progress for `stale_after` are failed, as the worker
+    running them must have stopped
+    """
+    now = datetime.utcnow()
+
+    db = SessionLocal()
+    try:
+        db.query(ReportJob).filter(ReportJob.finished_at < now - retention).delete(
+            synchronize_session=False
+        )
+        db.query(ReportJob).filter(
+            ReportJob.status.in_(IN_FLIGHT_STATUSES),
+            ReportJob.updated_at < now - stale_after,
+        ).update(
+            {
+                "status": ReportJobStatus.FAILED,
+                "error": "Report generation was interrupted",
+                "finished_at": now,
+            },
+            synchronize_session=False,
+        )
+
+        job = find_report_job(db, user_id, report_date, inputs_hash)
+        if job and not job.is_finished:
+            db.commit()
+            db.refresh(job)
+            return job, False
+
+        job = ReportJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            report_date=report_date,
+            inputs_hash=inputs_hash,
+        )
+        db.add(job)
+
+        try:
+            db.commit()
+            created = True
+        except IntegrityError:
+            # Another worker enqueued the same job first
+            db.rollback()
+            job = find_report_job(db, user_id, report_date, inputs_hash)
+            created = False
+
+        db.refresh(job)
+
+        return job, created
+    finally:
+        db.close()
+
+
+class ReportJobQueue:
+    """
+    Queue that generates daily reports in background tasks of the process
+    that enqueued them.
+
+    Jobs are stored in the report_jobs table, so they can be polled from
+    any worker, and a job identical to one still in flight in any worker
+    (same user, date and inputs) is reused instead of enqueued again. At
+    most `max_concurrency` reports are generated at the same time by each
+    process, and failed attempts are retried with exponential backoff.
+    Finished jobs are kept for polling for `retention` before being
+    discarded.
+
+    Jobs in flight write a heartbeat every `heartbeat_interval_in_seconds`,
+    also while they wait for their turn, so only the jobs of a stopped
+    worker go `stale_after` without progress
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_attempts: int,
+        retry_backoff_in_seconds: float,
+        retention: timedelta,
+        stale_after: timedelta,
+        heartbeat_interval_in_seconds: float,
+    ):
+        self.max_attempts = max_attempts
+        self.retry_backoff_in_seconds = retry_backoff_in_seconds
+        self.retention = retention
+        self.stale_after = stale_after
+        self.heartbeat_interval_in_seconds = heartbeat_interval_in_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Set once the jobs run by this process finish
+        self._done: Dict[str, asyncio.Event] = {}
+        self._tasks = set()
+
+    async def enqueue(self, user_id: int, report_date: date, prompt: str) -> ReportJob:
+        job, created = await run_in_threadpool(
+            create_report_job,
+            user_id,
+            report_date,
+            compute_report_inputs_hash(prompt),
+            self.retention,
+            self.stale_after,
+        )
+
+        if created:
+            self._done[job.id] = asyncio.Event()
+
+            task = asyncio.create_task(
+                self._run(job.id, job.user_id, job.report_date, prompt)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        return job
+
+    async def get(self, job_id: str) -> ReportJob | None:
+        return await run_in_threadpool(get_report_job, job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> None:
+        """
+        This method will wait for the job to finish when this process runs
+        it, and otherwise sleep. Either way it returns after `timeout` at
+        the latest, and the job must be read again
+        """
+        done = self._done.get(job_id)
+
+        if done is None:
+            await asyncio.sleep(timeout)
+            return
+
+        try:
+            await asyncio.wait_for(done.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval_in_seconds)
+            await run_in_threadpool(
+                update_report_job, job_id, {"updated_at": datetime.utcnow()}
+            )
+
+    async def _run(
+        self, job_id: str, user_id: int, report_date: date, prompt: str
+    ) -> None:
+        result: Dict[str, Any] = {
+            "status": ReportJobStatus.FAILED,
+            "error": "Report generation was interrupted",
+        }
+        attempts = 0
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+
+        try:
+            async with self._semaphore:
+                while True:
+                    attempts += 1
+                    await run_in_threadpool(
+                        update_report_job,
+                        job_id,
+                        {
+                            "status": ReportJobStatus.RUNNING,
+                            "attempts": attempts,
+                            "finished_at": None,
+                        },
+                    )
+
+                    try:
+                        content = await run_in_threadpool(
+                            generate_report, user_id, report_date, prompt
+                        )
+                        result = {
+                            "status": ReportJobStatus.COMPLETED,
+                            "content": content,
+                            "error": None,
+                        }
+                        break
+                    except Exception as e:
+                        if attempts >= self.max_attempts:
+                            result = {"status": ReportJobStatus.FAILED, "error": str(e)}
+                            break
+
+                        await asyncio.sleep(
+                            self.retry_backoff_in_seconds * 2 ** (attempts - 1)
+                        )
+        finally:
+            heartbeat.cancel()
+
+            try:
+                await run_in_threadpool(
+                    update_report_job,
+                    job_id,
+                    {**result, "finished_at": datetime.utcnow()},
+                )
+            finally:
+                self._done.pop(job_id).set()
+
+
+report_job_queue = ReportJobQueue(
+    max_concurrency=REPORT_JOBS_MAX_CONCURRENCY,
+    max_attempts=REPORT_JOBS_MAX_ATTEMPTS,
+    retry_backoff_in_seconds=REPORT_JOBS_RETRY_BACKOFF_IN_SECONDS,
+    retention=timedelta(minutes=REPORT_JOBS_RETENTION_IN_MINUTES),
+    stale_after=timedelta(minutes=REPORT_JOBS_STALE_AFTER_IN_MINUTES),
+    heartbeat_interval_in_seconds=REPORT_JOBS_HEARTBEAT_INTERVAL_IN_SECONDS,
+)
@@ -0,0 +1,189 @@
+import hashlib
+from collections import defaultdict
+from datetime import date
+from typing import Any, Dict, Iterator, List
+
+from openai import OpenAI
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.constants import (
+    ENCODING,
+    OPENAI_MODEL,
+    OPENAI_SYSTEM_PROMPT,
+    OPENAI_TIMEOUT_IN_SECONDS,
+)
+from app.database import SessionLocal
+from app.enums import Goals
+from app.models import Meal, Report
+from app.nutrition import FoodConsumptionMacros
+from app.schemas import UserRead
+
+client = OpenAI(timeout=OPENAI_TIMEOUT_IN_SECONDS)
+
+
+def build_daily_report_prompt(
+    user: UserRead, meals: List[Meal], daily_overview: Dict[str, Any], date: date
+) -> str:
+    if user.goal_type is Goals.LOSE_WEIGHT:
+        prompt = 'Objetivo: Perder peso\n'
+    elif user.goal_type is Goals.MAINTAIN_WEIGHT:
+        prompt = 'Objetivo: Manter peso\n'
+    else:
+        prompt = 'Objetivo: Ganhar peso\n'
+
+    prompt += f'TDEE (Total Daily Energy Expenditure): {user.tdee} kcal\n'
+    prompt += f'Calorias para atingir o objetivo: {user.goal_calories} kcal\n'
+    prompt += f'Data: {date.strftime(r"%d/%m/%Y")}\n'
+    prompt += f'Total de calorias ingeridas: {daily_overview["total_calories_intake"]} kcal\n'
+    prompt += f'Total de ingestão de água: {daily_overview["total_water_intake"]} ml\n'
+    prompt += f'Total de calorias queimadas: {daily_overview["total_calories_burned"]} kcal\n\n'
+
+    food_consumptions = daily_overview["food_consumptions"]
+    macros = FoodConsumptionMacros.from_food_consumptions(food_consumptions)
+
+    lines_by_meal_id = defaultdict(list)
+    for food_consumption, calories in zip(food_consumptions, macros.column("calories")):
+        lines_by_meal_id[food_consumption.meal_id].append(
+            f"    - Nome: {food_consumption.food.description} / Porção: {food_consumption.serving_size.name} / Quantidade: {food_consumption.quantity} / Calorias: {calories} kcal \n"
+        )
+
+    for meal in meals:
+        prompt += f"{meal.name}:\n"
+        prompt += "".join(lines_by_meal_id[meal.id])
+        prompt += "\n"
+
+    return prompt
+
+
+def compute_report_inputs_hash(prompt: str) -> str:
+    """
+    This method will hash everything the model sees when generating a
+    report. The prompt carries the day's consumptions, water intake,
+    exercise and the user's goal, so any change to them changes the hash
+    """
+    inputs = "\0".join((OPENAI_MODEL, OPENAI_SYSTEM_PROMPT, prompt))
+    return hashlib.sha256(inputs.encode(ENCODING)).hexdigest()
+
+
+def generate_report_content(prompt: str) -> str:
+    response = client.chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": OPENAI_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.5,
+        max_tokens=512,
+    )
+
+    return response.choices[0].message.content
+
+
+def stream_report_content(prompt: str) -> Iterator[str]:
+    stream = client.chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": OPENAI_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.5,
+        max_tokens=512,
+        stream=True,
+    )
+
+    for chunk in stream:
+        if chunk.choices and (content := chunk.choices[0].delta.content):
+            yield content
+
+
+def stream_and_save_report(
+    user_id: int, report_date: date, prompt: str
+) -> Iterator[str]:
+    """
+    This method will yield the report tokens as the model produces them and
+    store the full text once the stream ends. A stream abandoned halfway
+    through is not stored
+    """
+    chunks = []
+
+    for chunk in stream_report_content(prompt):
+        chunks.append(chunk)
+        yield chunk
+
+    store_report(
+        user_id, report_date, compute_report_inputs_hash(prompt), "".join(chunks)
+    )
+
+
+def get_stored_report(db: Session, user_id: int, report_date: date) -> Report | None:
+    return (
+        db.query(Report)
+        .filter(Report.user_id == user_id, Report.report_date == report_date)
+        .first()
+    )
+
+
+def save_report(
+    db: Session, user_id: int, report_date: date, inputs_hash: str, content: str
+) -> Report:
+    report_db = get_stored_report(db, user_id, report_date)
+
+    if not report_db:
+        report_db = Report(user_id=user_id, report_date=report_date)
+        db.add(report_db)
+
+    report_db.content = content
+    report_db.inputs_hash = inputs_hash
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request stored the same report first, overwrite it
+        db.rollback()
+        report_db = get_stored_report(db, user_id, report_date)
+        report_db.content = content
+        report_db.inputs_hash = inputs_hash
+        db.commit()
+
+    db.refresh(report_db)
+
+    return report_db
+
+
+def store_report(
+    user_id: int, report_date: date, inputs_hash: str, content: str
+) -> Report:
+    """
+    This method will save a generated report through a writer session of its
+    own. The session the report was generated from may be a read one, which
+    on SQLite doesn't take the write lock and would fail with "database is
+    locked" once the model was already paid for
+    """
+    db = SessionLocal()
+    try:
+        return save_report(db, user_id, report_date, inputs_hash, content)
+    finally:
+        db.close()
+
+
+def get_or_generate_daily_report(
+    db: Session, user_id: int, report_date: date, prompt: str
+) -> Report:
+    """
+    This method will return the stored report for the given day when it was
+    generated from the same inputs, and only call the model when there is
+    no report yet or the day's data changed since it was generated
+    """
+    inputs_hash = compute_report_inputs_hash(prompt)
+    report_db = get_stored_report(db, user_id, report_date)
+
+    if report_db and report_db.inputs_hash == inputs_hash:
+        return report_db
+
+    # Don't keep the transaction open while waiting for the model
+    db.commit()
+
+    content = generate_report_content(prompt)
+
+    return store_report(user_id, report_date, inputs_hash, content)
@@ -1,9 +1,15 @@
 from datetime import date, time
-from typing import List, Optional
+from typing import Dict, Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel
 
-from app.enums import ActivityLevels, Genders, Goals
+from app.enums import (
+    ActivityLevels,
+    Genders,
+    Goals,
+    HistoryGranularities,
+    ReportJobStatus,
+)
 
 
 def to_camel(string):
@@ -21,6 +27,20 @@ class SimpleResultMessage(CamelCaseModel):
     message: str
 
 
+class BatchCreateResult(CamelCaseModel):
+    # Ids of the created items, in the order they were sent
+    ids: List[int]
+
+
+T = TypeVar("T")
+
+
+class Page(CamelCaseModel, Generic[T]):
+    items: List[T]
+    # Cursor to pass as `after` for the next page, None on the last one
+    next_after: Optional[str] = None
+
+
 class RefreshTokenRequest(CamelCaseModel):
     refresh_token: str
 
@@ -128,6 +148,14 @@ class FoodRead(BaseFood):
         from_attributes = True
 
 
+class FoodSummary(BaseFood):
+    id: int
+    description: str
+
+    class Config:
+        from_attributes = True
+
+
 class WaterIntakeCreate(CamelCaseModel):
     quantity_in_mililiters: int
     intake_date: date
@@ -183,6 +211,14 @@ class ExerciseLogRead(ExerciseLogCreate):
         from_attributes = True
 
 
+class ExerciseLogSummary(ExerciseLogCreate):
+    id: int
+    calories_burned: int
+
+    class Config:
+        from_attributes = True
+
+
 class FoodConsumptionCreate(CamelCaseModel):
     quantity: float
     consumption_date: date
@@ -213,21 +249,111 @@ class FoodConsumptionRead(FoodConsumptionCreate):
         from_attributes = True
 
 
+class FoodConsumptionSummary(FoodConsumptionCreate):
+    id: int
+    calories: int
+    carbohydrates: int
+    proteins: int
+    lipids: int
+
+    class Config:
+        from_attributes = True
+
+
+class IncludedResources(CamelCaseModel):
+    """
+    The resources referenced by the summaries of a compact response, keyed
+    by id, each sent once however many summaries reference it
+    """
+
+    foods: Dict[int, FoodSummary] = {}
+    serving_sizes: Dict[int, ServingSizeRead] = {}
+    meals: Dict[int, MealRead] = {}
+    exercises: Dict[int, ExerciseRead] = {}
+
+
+class CompactList(CamelCaseModel, Generic[T]):
+    items: List[T]
+    included: IncludedResources
+
+
+class CompactPage(CompactList[T], Generic[T]):
+    # Cursor to pass as `after` for the next page, None on the last one
+    next_after: Optional[str] = None
+
+
 class ReportCreate(CamelCaseModel):
     report_date: date
 
 
 class ReportRead(ReportCreate):
     id: int
+    content: str
+
+    class Config:
+        from_attributes = True
+
+
+class ReportJobRead(CamelCaseModel):
+    id: str
+    status: ReportJobStatus
+    report_date: date
+    attempts: int
+    content: Optional[str] = None
+    error: Optional[str] = None
 
     class Config:
         from_attributes = True
 
 
+class MealMacros(CamelCaseModel):
+    meal_id: int
+    calories: int
+    carbohydrates: int
+    proteins: int
+    lipids: int
+
+
 class UserDailyOverview(CamelCaseModel):
     total_calories_intake: float
     total_water_intake: float
     total_calories_burned: float
+    # Macros of the day's food consumptions added up per meal, for the meals
+    # with any
+    meal_totals: List[MealMacros] = []
     food_consumptions: List[FoodConsumptionRead]
     water_intakes: List[WaterIntakeRead]
     exercise_logs: List[ExerciseLogRead]
+
+
+class UserDailyOverviewCompact(CamelCaseModel):
+    total_calories_intake: float
+    total_water_intake: float
+    total_calories_burned: float
+    meal_totals: List[MealMacros] = []
+    food_consumptions: List[FoodConsumptionSummary]
+    water_intakes: List[WaterIntakeRead]
+    exercise_logs: List[ExerciseLogSummary]
+    included: IncludedResources
+
+
+class UserHistoryBucket(CamelCaseModel):
+    start_date: date
+    days_logged: int
+    total_calories_intake: int
+    total_carbohydrates: int
+    total_proteins: int
+    total_lipids: int
+    total_water_intake: int
+    total_calories_burned: int
+    average_calories_intake: float
+    days_within_goal: Optional[int] = None
+    goal_adherence: Optional[float] = None
+
+
+class UserHistory(CamelCaseModel):
+    from_date: date
+    to_date: date
+    granularity: HistoryGranularities
+    goal_calories: Optional[int] = None
+    buckets: List[UserHistoryBucket]
@@ -0,0 +1,112 @@
+import re
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Created by the 0002 migration. On SQLite it is an FTS5 table kept in sync
+# with foods by triggers, on PostgreSQL a GIN index over FOOD_SEARCH_VECTOR.
+# Both still index the foods soft deleted by the catalog sync, so searches
+# filter them out
+FOOD_SEARCH_TABLE = "foods_search"
+
+# Name matches weigh more than description matches when ranking
+FOOD_SEARCH_NAME_WEIGHT = 10.0
+FOOD_SEARCH_DESCRIPTION_WEIGHT = 1.0
+
+# Must match the indexed expression of the 0002 migration
+FOOD_SEARCH_VECTOR = """
+    setweight(to_tsvector('simple', foods_search_fold(name)), 'A')
+    || setweight(to_tsvector('simple', foods_search_fold(description)), 'B')
+"""
+
+SEARCH_TERM_PATTERN = re.compile(r"\w+")
+
+
+def build_match_query(q: str) -> str:
+    """
+    This method will turn free text typed by the user into an FTS5 query
+    where every term is matched as a prefix, e.g. "feijão pre" becomes
+    '"feijão"* "pre"*'. Diacritics are folded by the index tokenizer
+    """
+    return " ".join(f'"{term}"*' for term in SEARCH_TERM_PATTERN.findall(q))
+
+
+def build_tsquery(q: str) -> str:
+    """
+    This method will turn free text typed by the user into a PostgreSQL
+    tsquery where every term is matched as a prefix, e.g. "feijão pre"
+    becomes "feijão:* & pre:*". Diacritics are folded in the query itself
+    """
+    return " & ".join(f"{term}:*" for term in SEARCH_TERM_PATTERN.findall(q))
+
+
+def search_foods(
+    db: Session, q: str, limit: int, offset: int = 0
+) -> List[Tuple[int, str, str]]:
+    if db.get_bind().dialect.name == "postgresql":
+        return search_foods_postgresql(db, q, limit, offset)
+
+    match_query = build_match_query(q)
+
+    if not match_query:
+        return []
+
+    result = db.execute(
+        text(
+            f"""
+            SELECT foods.id, foods.name, foods.description
+            FROM {FOOD_SEARCH_TABLE}
+            JOIN foods ON foods.id = {FOOD_SEARCH_TABLE}.rowid
+            WHERE {FOOD_SEARCH_TABLE} MATCH :match_query AND foods.deleted_at IS NULL
+            ORDER BY bm25({FOOD_SEARCH_TABLE}, :name_weight, :description_weight), foods.id
+            LIMIT :limit OFFSET :offset
+            """
+        ),
+        {
+            "match_query": match_query,
+            "name_weight": FOOD_SEARCH_NAME_WEIGHT,
+            "description_weight": FOOD_SEARCH_DESCRIPTION_WEIGHT,
+            "limit": limit,
+            "offset": offset,
+        },
+    )
+
+    return result.all()
+
+
+def search_foods_postgresql(
+    db: Session, q: str, limit: int, offset: int = 0
+) -> List[Tuple[int, str, str]]:
+    tsquery = build_tsquery(q)
+
+    if not tsquery:
+        return []
+
+    # ts_rank takes the weights of the D, C, B and A labels, in this order,
+    # and doesn't accept weights above one
+    max_weight = max(FOOD_SEARCH_NAME_WEIGHT, FOOD_SEARCH_DESCRIPTION_WEIGHT)
+    result = db.execute(
+        text(
+            f"""
+            SELECT id, name, description
+            FROM foods, to_tsquery('simple', foods_search_fold(:tsquery)) AS query
+            WHERE ({FOOD_SEARCH_VECTOR}) @@ query AND deleted_at IS NULL
+            ORDER BY ts_rank(
+                ARRAY[0, 0, :description_weight, :name_weight]::float4[],
+                {FOOD_SEARCH_VECTOR},
+                query
+            ) DESC, id
+            LIMIT :limit OFFSET :offset
+            """
+        ),
+        {
+            "tsquery": tsquery,
+            "name_weight": FOOD_SEARCH_NAME_WEIGHT / max_weight,
+            "description_weight": FOOD_SEARCH_DESCRIPTION_WEIGHT / max_weight,
+            "limit": limit,
+            "offset": offset,
+        },
+    )
+
+    return result.all()
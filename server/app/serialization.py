@@ -0,0 +1,34 @@
+from typing import Any, Mapping, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+class ResponseSerializer:
+    """
+    Validator and JSON serializer of a response model, built once.
+
+    FastAPI validates what a route returns, dumps it to JSON-compatible
+    python objects and then encodes those. Hot routes return
+    `serializer.response(...)` instead, and pydantic-core writes the JSON
+    bytes straight from the validated models. The route keeps its
+    response_model, which still documents the response
+    """
+
+    def __init__(self, response_model: Any):
+        self.adapter = TypeAdapter(response_model)
+
+    def serialize(self, content: Any) -> bytes:
+        value = self.adapter.validate_python(content, from_attributes=True)
+        return self.adapter.dump_json(value, by_alias=True)
+
+    def response(
+        self, content: Any, headers: Optional[Mapping[str, str]] = None
+    ) -> Response:
+        """
+        FastAPI doesn't merge the headers of the injected Response into one
+        returned by the route, so those (ETag, Cache-Control) are passed on
+        """
+        return Response(
+            self.serialize(content), media_type="application/json", headers=headers
+        )
@@ -0,0 +1,366 @@
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Date, case, cast, delete, func, insert, true, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.constants import GOAL_ADHERENCE_TOLERANCE, SUMMARY_REBUILD_BATCH_SIZE
+from app.enums import HistoryGranularities
+from app.models import (
+    DailySummary,
+    Exercise,
+    ExerciseLog,
+    FoodConsumption,
+    ServingSize,
+    WaterIntake,
+)
+from app.nutrition import FoodConsumptionMacros, compute_calories_burned, sum_by
+
+SUMMARY_COLUMNS = (
+    "calories_intake",
+    "carbohydrates",
+    "proteins",
+    "lipids",
+    "water_intake_in_mililiters",
+    "calories_burned",
+)
+
+# Both dialects support INSERT ... ON CONFLICT DO UPDATE with the same API
+UPSERT_INSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+def get_daily_summary(
+    db: Session, user_id: int, summary_date: date
+) -> DailySummary | None:
+    return (
+        db.query(DailySummary)
+        .filter(
+            DailySummary.user_id == user_id, DailySummary.summary_date == summary_date
+        )
+        .first()
+    )
+
+
+def increment_daily_summary(
+    db: Session, user_id: int, summary_date: date, deltas: Dict[str, int]
+) -> None:
+    """
+    This method will add the given deltas to the user's summary of the day
+    with a single atomic upsert, creating the summary when it doesn't exist
+    """
+    now = datetime.utcnow()
+    values = {column: deltas.get(column, 0) for column in SUMMARY_COLUMNS}
+
+    upsert_insert = UPSERT_INSERTS[db.get_bind().dialect.name]
+
+    statement = upsert_insert(DailySummary).values(
+        user_id=user_id,
+        summary_date=summary_date,
+        created_at=now,
+        updated_at=now,
+        **values,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[DailySummary.user_id, DailySummary.summary_date],
+        set_={
+            **{
+                column: getattr(DailySummary, column) + statement.excluded[column]
+                for column in SUMMARY_COLUMNS
+            },
+            "updated_at": now,
+        },
+    )
+
+    db.execute(statement)
+
+
+def increment_daily_summaries(
+    db: Session, user_id: int, entries: Iterable[Tuple[date, Dict[str, int]]]
+) -> None:
+    """
+    This method will add the totals of many logs to the user's summaries,
+    with a single upsert per day however many logs fall on it
+    """
+    deltas_by_date = defaultdict(lambda: dict.fromkeys(SUMMARY_COLUMNS, 0))
+
+    for summary_date, totals in entries:
+        for column, value in totals.items():
+            deltas_by_date[summary_date][column] += value
+
+    for summary_date, deltas in deltas_by_date.items():
+        increment_daily_summary(db, user_id, summary_date, deltas)
+
+
+def serving_size_totals(serving_size, quantity: float) -> Dict[str, int]:
+    return {
+        "calories_intake": round(serving_size.calories * quantity),
+        "carbohydrates": round(serving_size.carbohydrates * quantity),
+        "proteins": round(serving_size.proteins * quantity),
+        "lipids": round(serving_size.lipids * quantity),
+    }
+
+
+def food_consumption_totals(
+    db: Session, food_consumption: FoodConsumption
+) -> Dict[str, int]:
+    # Loaded by id so that a serving size changed on update is taken into account
+    serving_size = db.get(ServingSize, food_consumption.serving_size_id)
+
+    return serving_size_totals(serving_size, food_consumption.quantity)
+
+
+def water_intake_totals(db: Session, water_intake: WaterIntake) -> Dict[str, int]:
+    return {"water_intake_in_mililiters": water_intake.quantity_in_mililiters}
+
+
+def exercise_totals(calories_per_hour: int, duration_in_hours: float) -> Dict[str, int]:
+    return {"calories_burned": round(duration_in_hours * calories_per_hour)}
+
+
+def exercise_log_totals(db: Session, exercise_log: ExerciseLog) -> Dict[str, int]:
+    exercise = db.get(Exercise, exercise_log.exercise_id)
+
+    return exercise_totals(exercise.calories_per_hour, exercise_log.duration_in_hours)
+
+
+def apply_food_consumption(
+    db: Session, food_consumption: FoodConsumption, sign: int = 1
+) -> None:
+    """
+    This method will add (sign=1) or remove (sign=-1) the food consumption
+    from its day's summary. Updates remove the old values before changing
+    the row and add the new ones afterwards
+    """
+    totals = food_consumption_totals(db, food_consumption)
+    increment_daily_summary(
+        db,
+        food_consumption.user_id,
+        food_consumption.consumption_date,
+        {column: sign * value for column, value in totals.items()},
+    )
+
+
+def apply_water_intake(db: Session, water_intake: WaterIntake, sign: int = 1) -> None:
+    totals = water_intake_totals(db, water_intake)
+    increment_daily_summary(
+        db,
+        water_intake.user_id,
+        water_intake.intake_date,
+        {column: sign * value for column, value in totals.items()},
+    )
+
+
+def apply_exercise_log(db: Session, exercise_log: ExerciseLog, sign: int = 1) -> None:
+    totals = exercise_log_totals(db, exercise_log)
+    increment_daily_summary(
+        db,
+        exercise_log.user_id,
+        exercise_log.practice_date,
+        {column: sign * value for column, value in totals.items()},
+    )
+
+
+def rebuild_daily_summaries(
+    db: Session,
+    user_ids: Optional[Iterable[int]] = None,
+    days: Optional[Iterable[Tuple[int, date]]] = None,
+) -> int:
+    """
+    This method will recompute the daily summaries from the log tables,
+    either for every user, only for the given ones or only for the given
+    (user id, date) days, replacing whatever is stored. It is used to
+    recover from drift, e.g. after rows were changed outside of the API or
+    deleted in bulk. Returns the number of summaries written
+    """
+    if user_ids is not None:
+        user_ids = list(user_ids)
+
+    if days is not None:
+        days = list(days)
+
+        if not days:
+            return 0
+
+        if len(days) > SUMMARY_REBUILD_BATCH_SIZE:
+            return sum(
+                rebuild_daily_summaries(
+                    db, days=days[start : start + SUMMARY_REBUILD_BATCH_SIZE]
+                )
+                for start in range(0, len(days), SUMMARY_REBUILD_BATCH_SIZE)
+            )
+
+    def scope(user_id_column, date_column):
+        if days is not None:
+            return tuple_(user_id_column, date_column).in_(days)
+        if user_ids is not None:
+            return user_id_column.in_(user_ids)
+        return true()
+
+    totals = defaultdict(lambda: dict.fromkeys(SUMMARY_COLUMNS, 0))
+
+    food_consumptions = (
+        db.query(
+            FoodConsumption.user_id,
+            FoodConsumption.consumption_date,
+            FoodConsumption.quantity,
+            ServingSize.calories,
+            ServingSize.carbohydrates,
+            ServingSize.proteins,
+            ServingSize.lipids,
+        )
+        .join(ServingSize, FoodConsumption.serving_size_id == ServingSize.id)
+        .filter(scope(FoodConsumption.user_id, FoodConsumption.consumption_date))
+        .all()
+    )
+    food_consumption_macros = FoodConsumptionMacros.from_rows(
+        [row[2:] for row in food_consumptions]
+    )
+    food_consumption_days = food_consumption_macros.totals_by(
+        (user_id, consumption_date) for user_id, consumption_date, *_ in food_consumptions
+    )
+    for key, macros in food_consumption_days.items():
+        day = totals[key]
+        day["calories_intake"] += macros["calories"]
+        day["carbohydrates"] += macros["carbohydrates"]
+        day["proteins"] += macros["proteins"]
+        day["lipids"] += macros["lipids"]
+
+    water_intakes = db.query(
+        WaterIntake.user_id,
+        WaterIntake.intake_date,
+        WaterIntake.quantity_in_mililiters,
+    ).filter(scope(WaterIntake.user_id, WaterIntake.intake_date))
+    for user_id, intake_date, quantity_in_mililiters in water_intakes:
+        totals[(user_id, intake_date)]["water_intake_in_mililiters"] += quantity_in_mililiters
+
+    exercise_logs = (
+        db.query(
+            ExerciseLog.user_id,
+            ExerciseLog.practice_date,
+            ExerciseLog.duration_in_hours,
+            Exercise.calories_per_hour,
+        )
+        .join(Exercise, ExerciseLog.exercise_id == Exercise.id)
+        .filter(scope(ExerciseLog.user_id, ExerciseLog.practice_date))
+        .all()
+    )
+    calories_burned = compute_calories_burned(
+        (row.duration_in_hours for row in exercise_logs),
+        (row.calories_per_hour for row in exercise_logs),
+    )
+    exercise_days = sum_by(
+        ((row.user_id, row.practice_date) for row in exercise_logs), calories_burned
+    )
+    for key, value in exercise_days.items():
+        totals[key]["calories_burned"] += value
+
+    db.execute(
+        delete(DailySummary).where(
+            scope(DailySummary.user_id, DailySummary.summary_date)
+        )
+    )
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "user_id": user_id,
+            "summary_date": summary_date,
+            "created_at": now,
+            "updated_at": now,
+            **values,
+        }
+        for (user_id, summary_date), values in totals.items()
+    ]
+    if rows:
+        db.execute(insert(DailySummary), rows)
+
+    return len(rows)
+
+
+def bucket_start_date(column, granularity: HistoryGranularities, dialect: str):
+    if dialect == "postgresql":
+        if granularity is HistoryGranularities.DAY:
+            return column
+        # date_trunc weeks already start on Monday
+        return cast(func.date_trunc(granularity.value, column), Date)
+
+    if granularity is HistoryGranularities.WEEK:
+        # Weeks start on Monday: move to the week's Sunday, then back six days
+        return func.date(column, "weekday 0", "-6 days", type_=Date)
+    if granularity is HistoryGranularities.MONTH:
+        return func.date(column, "start of month", type_=Date)
+    return column
+
+
+def get_history_buckets(
+    db: Session,
+    user_id: int,
+    from_date: date,
+    to_date: date,
+    granularity: HistoryGranularities,
+    goal_calories: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    This method will aggregate the user's daily summaries between the given
+    dates into day, week or month buckets with a single GROUP BY. Days
+    logged are the days with any food consumption, and a day is within the
+    goal when its intake is within GOAL_ADHERENCE_TOLERANCE of the goal
+    """
+    start_date = bucket_start_date(
+        DailySummary.summary_date, granularity, db.get_bind().dialect.name
+    )
+    has_food_logged = DailySummary.calories_intake > 0
+
+    columns = [
+        start_date.label("start_date"),
+        func.sum(case((has_food_logged, 1), else_=0)).label("days_logged"),
+        func.sum(DailySummary.calories_intake).label("total_calories_intake"),
+        func.sum(DailySummary.carbohydrates).label("total_carbohydrates"),
+        func.sum(DailySummary.proteins).label("total_proteins"),
+        func.sum(DailySummary.lipids).label("total_lipids"),
+        func.sum(DailySummary.water_intake_in_mililiters).label("total_water_intake"),
+        func.sum(DailySummary.calories_burned).label("total_calories_burned"),
+    ]
+
+    if goal_calories:
+        within_goal = has_food_logged & (
+            func.abs(DailySummary.calories_intake - goal_calories)
+            <= goal_calories * GOAL_ADHERENCE_TOLERANCE
+        )
+        columns.append(func.sum(case((within_goal, 1), else_=0)).label("days_within_goal"))
+
+    rows = (
+        db.query(*columns)
+        .filter(
+            DailySummary.user_id == user_id,
+            DailySummary.summary_date >= from_date,
+            DailySummary.summary_date <= to_date,
+        )
+        .group_by(start_date)
+        .order_by(start_date)
+        .all()
+    )
+
+    buckets = []
+
+    for row in rows:
+        bucket = row._asdict()
+        days_logged = bucket["days_logged"]
+
+        bucket["average_calories_intake"] = (
+            bucket["total_calories_intake"] / days_logged if days_logged else 0.0
+        )
+        if goal_calories:
+            bucket["goal_adherence"] = (
+                bucket["days_within_goal"] / days_logged if days_logged else None
+            )
+
+        buckets.append(bucket)
+
+    return buckets
@@ -1,7 +1,6 @@
-import json
 from typing import Union
 
-from app.constants import DEFAULT_EXERCISES, POPULATE_DB_JSON_FILE_PATH
+from app.constants import POPULATE_DB_JSON_FILE_PATH
 from app.enums import ActivityLevels, Genders, Goals
 
 
@@ -64,46 +63,13 @@ def calculate_goal_calories(tdee: int, goal_type: Union[str, Goals]) -> int:
 
 
 def populate_database():
+    from app.catalog import import_default_exercises, sync_foods
     from app.database import SessionLocal
-    from app.models import Exercise, Food, ServingSize
-
-    with open(POPULATE_DB_JSON_FILE_PATH, "r") as json_file:
-        food_data = json.load(json_file)
 
     db = SessionLocal()
-
-    for food_item in food_data:
-        food = Food(
-            name=food_item["name"],
-            description=food_item["description"],
-            calories=food_item.get("kcal"),
-            carbohydrates=food_item.get("carbohydrates"),
-            proteins=food_item.get("protein"),
-            lipids=food_item.get("lipids"),
-        )
-
-        food.serving_sizes.append(ServingSize(
-            name="100g",
-            calories=food_item.get("kcal"),
-            carbohydrates=food_item.get("carbohydrates"),
-            proteins=food_item.get("protein"),
-            lipids=food_item.get("lipids"),
-        ))
-
-        for serving_size_item in food_item.get("portions", []):
-            serving_size = ServingSize(
-                name=serving_size_item["name"],
-                calories=serving_size_item.get("kcal"),
-                carbohydrates=serving_size_item.get("carbohydrates"),
-                proteins=serving_size_item.get("protein"),
-                lipids=serving_size_item.get("lipids"),
-            )
-            food.serving_sizes.append(serving_size)
-
-        db.add(food)
-    
-    for exercise_data in DEFAULT_EXERCISES:
-        db.add(Exercise(**exercise_data))
-
-    db.commit()
-    db.close()
+    try:
+        sync_foods(db, POPULATE_DB_JSON_FILE_PATH)
+        import_default_exercises(db)
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,131 @@
+"""
+Rows per second of the food catalog sync (python -m app.cli
+import-catalog) against the row by row ORM load it replaced, on a fresh
+database, when syncing the same file again and when a few foods changed. Run from the server
+directory, optionally with DATABASE_URL pointing to an empty PostgreSQL
+database (it is migrated and cleared between runs):
+
+    python benchmarks/catalog_import.py
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/benchmark.db"
+
+sys.path.insert(0, str(SERVER_DIR))
+
+from sqlalchemy import delete, update  # noqa: E402
+
+from app.catalog import sync_foods  # noqa: E402
+from app.constants import POPULATE_DB_JSON_FILE_PATH  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from app.models import Food, ServingSize  # noqa: E402
+
+
+def import_row_by_row(db) -> int:
+    with open(POPULATE_DB_JSON_FILE_PATH, "r") as json_file:
+        food_data = json.load(json_file)
+
+    rows = 0
+
+    for food_item in food_data:
+        food = Food(
+            name=food_item["name"],
+            description=food_item["description"],
+            calories=food_item.get("kcal"),
+            carbohydrates=food_item.get("carbohydrates"),
+            proteins=food_item.get("protein"),
+            lipids=food_item.get("lipids"),
+        )
+
+        food.serving_sizes.append(ServingSize(
+            name="100g",
+            calories=food_item.get("kcal"),
+            carbohydrates=food_item.get("carbohydrates"),
+            proteins=food_item.get("protein"),
+            lipids=food_item.get("lipids"),
+        ))
+
+        for serving_size_item in food_item.get("portions", []):
+            food.serving_sizes.append(ServingSize(
+                name=serving_size_item["name"],
+                calories=serving_size_item.get("kcal"),
+                carbohydrates=serving_size_item.get("carbohydrates"),
+                proteins=serving_size_item.get("protein"),
+                lipids=serving_size_item.get("lipids"),
+            ))
+
+        db.add(food)
+        rows += 1 + len(food.serving_sizes)
+
+    return rows
+
+
+def import_bulk(db) -> int:
+    return sync_foods(db, POPULATE_DB_JSON_FILE_PATH).rows
+
+
+def change_foods(db) -> None:
+    # Forget the hash of a few foods, as if their items changed in the file
+    db.execute(
+        update(Food).where(Food.id % 100 == 0).values(content_hash=None, calories=0)
+    )
+
+
+def clear_catalog() -> None:
+    db = SessionLocal()
+    try:
+        db.execute(delete(ServingSize))
+        db.execute(delete(Food))
+        db.commit()
+    finally:
+        db.close()
+
+
+def measure(name: str, load) -> None:
+    db = SessionLocal()
+    try:
+        started_at = time.perf_counter()
+        rows = load(db)
+        db.commit()
+        elapsed = time.perf_counter() - started_at
+    finally:
+        db.close()
+
+    print(f"{name:>18}: {rows / elapsed:8.0f} rows/s, {rows} rows in {elapsed:.2f}s")
+
+
+def main() -> None:
+    subprocess.run(
+        ["alembic", "upgrade", "head"],
+        cwd=SERVER_DIR,
+        check=True,
+        capture_output=True,
+    )
+
+    clear_catalog()
+    measure("row by row", import_row_by_row)
+
+    clear_catalog()
+    measure("sync", import_bulk)
+    measure("sync, unchanged", import_bulk)
+
+    db = SessionLocal()
+    change_foods(db)
+    db.commit()
+    db.close()
+    measure("sync, 1% changed", import_bulk)
+
+    clear_catalog()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Encode time and bytes on the wire of the largest responses: a daily
+overview of 200 food consumptions (in the full and in the compact view)
+and a dump of the whole food catalog
+(every FoodRead with its serving sizes). Each is encoded the way FastAPI
+does by default (with the json and the orjson response classes) and
+through the precompiled ResponseSerializer, and its body is compressed as
+CompressionMiddleware would (brotli only when installed). Run from the
+server directory:
+
+    python benchmarks/response_encoding.py
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, time as day_time
+from pathlib import Path
+from typing import List
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/benchmark.db"
+
+sys.path.insert(0, str(SERVER_DIR))
+
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from app.catalog import sync_foods  # noqa: E402
+from app.compression import BrotliCompressor, GzipCompressor, brotli  # noqa: E402
+from app.constants import (  # noqa: E402
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_GZIP_LEVEL,
+    POPULATE_DB_JSON_FILE_PATH,
+)
+from app.database import SessionLocal  # noqa: E402
+from app.enums import ResponseViews  # noqa: E402
+from app.included import build_included  # noqa: E402
+from app.loaders import (  # noqa: E402
+    FOOD_CONSUMPTION_READ_OPTIONS,
+    FOOD_CONSUMPTION_SUMMARY_OPTIONS,
+    FOOD_READ_OPTIONS,
+)
+from app.models import Food, FoodConsumption, Meal, User  # noqa: E402
+from app.schemas import (  # noqa: E402
+    FoodRead,
+    UserDailyOverview,
+    UserDailyOverviewCompact,
+)
+from app.serialization import ResponseSerializer  # noqa: E402
+
+DAY = date(2024, 11, 20)
+DAY_CONSUMPTIONS = 200
+REPETITIONS = 5
+
+
+def populate(db) -> None:
+    sync_foods(db, POPULATE_DB_JSON_FILE_PATH)
+
+    user = User(name="Benchmark", email="benchmark@example.com", hashed_password="")
+    meal = Meal(name="Almoço", default_time=day_time(11), user=user)
+    db.add_all([user, meal])
+
+    foods = (
+        db.query(Food)
+        .options(*FOOD_READ_OPTIONS)
+        .order_by(Food.id)
+        .limit(DAY_CONSUMPTIONS)
+    )
+    db.add_all(
+        FoodConsumption(
+            quantity=1.5,
+            consumption_date=DAY,
+            user=user,
+            meal=meal,
+            food=food,
+            serving_size=food.serving_sizes[-1],
+        )
+        for food in foods
+    )
+    db.commit()
+
+
+def load_day(db, view: ResponseViews) -> dict:
+    food_consumptions = (
+        db.query(FoodConsumption)
+        .options(
+            *(
+                FOOD_CONSUMPTION_SUMMARY_OPTIONS
+                if view == ResponseViews.COMPACT
+                else FOOD_CONSUMPTION_READ_OPTIONS
+            )
+        )
+        .filter(FoodConsumption.consumption_date == DAY)
+        .all()
+    )
+
+    day = {
+        "total_calories_intake": sum(
+            consumption.calories for consumption in food_consumptions
+        ),
+        "total_water_intake": 0.0,
+        "total_calories_burned": 0,
+        "food_consumptions": food_consumptions,
+        "water_intakes": [],
+        "exercise_logs": [],
+    }
+
+    if view == ResponseViews.COMPACT:
+        day["included"] = build_included(food_consumptions)
+
+    return day
+
+
+def load_catalog(db) -> list:
+    return (
+        db.query(Food)
+        .options(*FOOD_READ_OPTIONS)
+        .filter(Food.user_id.is_(None), Food.deleted_at.is_(None))
+        .all()
+    )
+
+
+def create_default_encoder(response_model, response_class):
+    field = create_response_field(name="Response", type_=response_model)
+
+    def encode(content) -> bytes:
+        value = asyncio.run(
+            serialize_response(field=field, response_content=content)
+        )
+        return response_class(value).body
+
+    return encode
+
+
+def measure_time(encode, content) -> float:
+    timings = []
+
+    for _ in range(REPETITIONS):
+        started_at = time.perf_counter()
+        encode(content)
+        timings.append(time.perf_counter() - started_at)
+
+    return min(timings)
+
+
+def compress(compressor, body: bytes) -> bytes:
+    return compressor.compress(body) + compressor.finish()
+
+
+def report(name: str, response_model, content) -> None:
+    encoders = {
+        "fastapi, json": create_default_encoder(response_model, JSONResponse),
+        "fastapi, orjson": create_default_encoder(response_model, ORJSONResponse),
+        "precompiled": ResponseSerializer(response_model).serialize,
+    }
+
+    print(name)
+
+    for encoder_name, encode in encoders.items():
+        elapsed = measure_time(encode, content)
+        print(f"{encoder_name:>18}: {elapsed * 1000:8.1f} ms")
+
+    body = encoders["precompiled"](content)
+    print(f"{'identity':>18}: {len(body):8d} bytes")
+
+    compressors = {"gzip": lambda: GzipCompressor(COMPRESSION_GZIP_LEVEL)}
+    if brotli is not None:
+        compressors["br"] = lambda: BrotliCompressor(COMPRESSION_BROTLI_QUALITY)
+
+    for encoding, create_compressor in compressors.items():
+        started_at = time.perf_counter()
+        size = len(compress(create_compressor(), body))
+        elapsed = time.perf_counter() - started_at
+
+        print(
+            f"{encoding:>18}: {size:8d} bytes ({size / len(body):.0%}),"
+            f" compressed in {elapsed * 1000:.1f} ms"
+        )
+
+    if brotli is None:
+        print(f"{'br':>18}: brotli is not installed")
+
+
+def main() -> None:
+    subprocess.run(
+        ["alembic", "upgrade", "head"],
+        cwd=SERVER_DIR,
+        check=True,
+        capture_output=True,
+    )
+
+    db = SessionLocal()
+    try:
+        if not db.query(FoodConsumption).filter_by(consumption_date=DAY).count():
+            populate(db)
+
+        report(
+            f"Daily overview, {DAY_CONSUMPTIONS} food consumptions",
+            UserDailyOverview,
+            load_day(db, ResponseViews.FULL),
+        )
+        report(
+            f"Compact daily overview, {DAY_CONSUMPTIONS} food consumptions",
+            UserDailyOverviewCompact,
+            load_day(db, ResponseViews.COMPACT),
+        )
+        report("Food catalog", List[FoodRead], load_catalog(db))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Write throughput of SQLite under concurrent clients, with and without the
+production mode of app/database.py (DATABASE_SQLITE_PRODUCTION).
+
+Every client is a thread of one of several worker processes, like the
+threads of uvicorn workers, writing water intakes the way
+POST /water-intakes/ does: load the user, insert the intake and update the
+day's summary in one transaction. Run from the server directory:
+
+    python benchmarks/sqlite_write_throughput.py --workers 4 --threads 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+PROFILES = {
+    "default": {},
+    "production": {"DATABASE_SQLITE_PRODUCTION": "true"},
+}
+
+
+def run_worker(args: argparse.Namespace) -> None:
+    sys.path.insert(0, str(SERVER_DIR))
+
+    from sqlalchemy.exc import OperationalError
+
+    from app.database import SessionLocal
+    from app.models import User, WaterIntake
+    from app.summaries import apply_water_intake
+
+    db = SessionLocal()
+    user = User(name="Benchmark", email=f"benchmark-{os.getpid()}@nutritrack.com")
+    user.hashed_password = ""
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    writes = 0
+    errors = 0
+    counter_lock = threading.Lock()
+
+    def client():
+        nonlocal writes, errors
+
+        for _ in range(args.writes):
+            db = SessionLocal()
+            try:
+                db.get(User, user_id)
+                water_intake = WaterIntake(
+                    quantity_in_mililiters=250,
+                    intake_date=date(2024, 11, 20),
+                    user_id=user_id,
+                )
+                db.add(water_intake)
+                db.flush()
+                apply_water_intake(db, water_intake)
+                db.commit()
+                succeeded = True
+            except OperationalError:
+                db.rollback()
+                succeeded = False
+            finally:
+                db.close()
+
+            with counter_lock:
+                if succeeded:
+                    writes += 1
+                else:
+                    errors += 1
+
+    time.sleep(max(0.0, args.start_at - time.time()))
+    started_at = time.perf_counter()
+
+    threads = [threading.Thread(target=client) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - started_at
+    print(json.dumps({"writes": writes, "errors": errors, "elapsed": elapsed}))
+
+
+def run_profile(profile: str, args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        env = {
+            **os.environ,
+            **PROFILES[profile],
+            "DATABASE_URL": f"sqlite:///{directory}/benchmark.db",
+        }
+        subprocess.run(
+            ["alembic", "upgrade", "head"],
+            cwd=SERVER_DIR,
+            env=env,
+            check=True,
+            capture_output=True,
+        )
+
+        # Give every worker time to import the app before the clients start
+        start_at = time.time() + 3
+        workers = [
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    __file__,
+                    "--worker",
+                    "--threads", str(args.threads),
+                    "--writes", str(args.writes),
+                    "--start-at", str(start_at),
+                ],
+                cwd=SERVER_DIR,
+                env=env,
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            for _ in range(args.workers)
+        ]
+        results = [json.loads(worker.communicate()[0]) for worker in workers]
+
+    writes = sum(result["writes"] for result in results)
+    elapsed = max(result["elapsed"] for result in results)
+
+    return {
+        "writes": writes,
+        "errors": sum(result["errors"] for result in results),
+        "writes_per_second": writes / elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4, help="Processes")
+    parser.add_argument("--threads", type=int, default=4, help="Clients per process")
+    parser.add_argument("--writes", type=int, default=200, help="Writes per client")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--start-at", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    clients = args.workers * args.threads
+    print(f"{args.workers} workers x {args.threads} threads = {clients} clients")
+
+    for profile in PROFILES:
+        result = run_profile(profile, args)
+        print(
+            f"{profile:>10}: {result['writes_per_second']:8.1f} writes/s, "
+            f"{result['writes']} written, {result['errors']} failed"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.database import SQLALCHEMY_DATABASE_URL, engine
+from app.models import Base
+from app.search import FOOD_SEARCH_TABLE
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_name(name, type_, parent_names) -> bool:
+    # The food search index (FTS5 and its shadow tables on SQLite, a GIN
+    # index on PostgreSQL) is managed by hand in migrations, autogenerate must
+    # not try to drop it
+    if type_ in ("table", "index"):
+        return not name.startswith(FOOD_SEARCH_TABLE)
+    return True
+
+
+def run_migrations_offline() -> None:
+    """
+    Emit the migrations as SQL script output instead of running them
+    against the database, e.g. `alembic upgrade head --sql`
+    """
+    context.configure(
+        url=SQLALCHEMY_DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+        include_name=include_name,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite can't alter most constraints in place, so tables are
+            # recreated by batch operations
+            render_as_batch=True,
+            include_name=include_name,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
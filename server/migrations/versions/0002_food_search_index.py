@@ -0,0 +1,105 @@
+"""Full-text search index over foods
+
+SQLite gets an FTS5 table kept in sync by triggers, PostgreSQL a GIN index over
+the weighted tsvector of the (lowercased, unaccented) name and description.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Must match FOOD_SEARCH_VECTOR in app/search.py for the index to be used
+FOOD_SEARCH_VECTOR = """
+    setweight(to_tsvector('simple', foods_search_fold(name)), 'A')
+    || setweight(to_tsvector('simple', foods_search_fold(description)), 'B')
+"""
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name == "postgresql":
+        upgrade_postgresql()
+        return
+
+    op.execute(
+        """
+        CREATE VIRTUAL TABLE foods_search USING fts5(
+            name,
+            description,
+            content='foods',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER foods_search_after_insert AFTER INSERT ON foods BEGIN
+            INSERT INTO foods_search(rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER foods_search_after_delete AFTER DELETE ON foods BEGIN
+            INSERT INTO foods_search(foods_search, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER foods_search_after_update
+        AFTER UPDATE OF name, description ON foods BEGIN
+            INSERT INTO foods_search(foods_search, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO foods_search(rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+        """
+    )
+    # Index the foods that already exist
+    op.execute("INSERT INTO foods_search(foods_search) VALUES ('rebuild')")
+
+
+def upgrade_postgresql() -> None:
+    # unaccent isn't immutable (and not always installed), so diacritics are
+    # folded with translate, which can be used by an expression index
+    op.execute(
+        """
+        CREATE FUNCTION foods_search_fold(value text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+            SELECT translate(
+                lower(value),
+                'áàâãäåéèêëíìîïóòôõöúùûüýÿçñ',
+                'aaaaaaeeeeiiiiooooouuuuyycn'
+            )
+        $$
+        """
+    )
+    op.execute(f"CREATE INDEX foods_search ON foods USING gin (({FOOD_SEARCH_VECTOR}))")
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == "postgresql":
+        op.execute("DROP INDEX foods_search")
+        op.execute("DROP FUNCTION foods_search_fold(text)")
+        return
+
+    op.execute("DROP TRIGGER foods_search_after_update")
+    op.execute("DROP TRIGGER foods_search_after_delete")
+    op.execute("DROP TRIGGER foods_search_after_insert")
+    op.execute("DROP TABLE foods_search")
@@ -0,0 +1,48 @@
+"""Make reports unique per user and date and store their inputs hash
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 09:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The reports table as left by 0001, so batch operations don't have to reflect
+# it and the revision can also be emitted as SQL
+reports_0001 = sa.Table('reports', sa.MetaData(),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.String(), nullable=False),
+    sa.Column('report_date', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.Index('ix_reports_report_date', 'report_date', unique=True),
+)
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('reports', schema=None, copy_from=reports_0001) as batch_op:
+        batch_op.add_column(sa.Column('inputs_hash', sa.String(), nullable=True))
+        batch_op.drop_index('ix_reports_report_date')
+        batch_op.create_index(batch_op.f('ix_reports_report_date'), ['report_date'], unique=False)
+        batch_op.create_unique_constraint('uq_reports_user_id_report_date', ['user_id', 'report_date'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_reports_user_id_report_date', type_='unique')
+        batch_op.drop_index(batch_op.f('ix_reports_report_date'))
+        batch_op.create_index('ix_reports_report_date', ['report_date'], unique=True)
+        batch_op.drop_column('inputs_hash')
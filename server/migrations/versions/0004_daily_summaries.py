@@ -0,0 +1,100 @@
+"""Add daily summaries
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 09:30:00
+
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SUMMARY_COLUMNS = (
+    'calories_intake',
+    'carbohydrates',
+    'proteins',
+    'lipids',
+    'water_intake_in_mililiters',
+    'calories_burned',
+)
+
+
+def upgrade() -> None:
+    daily_summaries = op.create_table('daily_summaries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('summary_date', sa.Date(), nullable=False),
+    sa.Column('calories_intake', sa.Integer(), nullable=False),
+    sa.Column('carbohydrates', sa.Integer(), nullable=False),
+    sa.Column('proteins', sa.Integer(), nullable=False),
+    sa.Column('lipids', sa.Integer(), nullable=False),
+    sa.Column('water_intake_in_mililiters', sa.Integer(), nullable=False),
+    sa.Column('calories_burned', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'summary_date', name='uq_daily_summaries_user_id_summary_date')
+    )
+
+    if op.get_context().as_sql:
+        # There is no data to summarize when only emitting SQL, run
+        # `python -m app.cli rebuild-daily-summaries` afterwards instead
+        return
+
+    # Summarize the existing logs, rounding every item like the models do
+    connection = op.get_bind()
+    totals = defaultdict(lambda: dict.fromkeys(SUMMARY_COLUMNS, 0))
+
+    food_consumptions = connection.execute(sa.text(
+        """
+        SELECT fc.user_id, fc.consumption_date, fc.quantity,
+               ss.calories, ss.carbohydrates, ss.proteins, ss.lipids
+        FROM food_consuptions fc
+        JOIN serving_sizes ss ON ss.id = fc.serving_size_id
+        """
+    ).columns(consumption_date=sa.Date()))
+    for user_id, consumption_date, quantity, calories, carbohydrates, proteins, lipids in food_consumptions:
+        day = totals[(user_id, consumption_date)]
+        day['calories_intake'] += round(calories * quantity)
+        day['carbohydrates'] += round(carbohydrates * quantity)
+        day['proteins'] += round(proteins * quantity)
+        day['lipids'] += round(lipids * quantity)
+
+    water_intakes = connection.execute(sa.text(
+        "SELECT user_id, intake_date, quantity_in_mililiters FROM water_intakes"
+    ).columns(intake_date=sa.Date()))
+    for user_id, intake_date, quantity_in_mililiters in water_intakes:
+        totals[(user_id, intake_date)]['water_intake_in_mililiters'] += quantity_in_mililiters
+
+    exercise_logs = connection.execute(sa.text(
+        """
+        SELECT el.user_id, el.practice_date, el.duration_in_hours, e.calories_per_hour
+        FROM exercise_logs el
+        JOIN exercises e ON e.id = el.exercise_id
+        """
+    ).columns(practice_date=sa.Date()))
+    for user_id, practice_date, duration_in_hours, calories_per_hour in exercise_logs:
+        totals[(user_id, practice_date)]['calories_burned'] += round(duration_in_hours * calories_per_hour)
+
+    now = datetime.utcnow()
+    rows = [
+        {'user_id': user_id, 'summary_date': summary_date, 'created_at': now, 'updated_at': now, **values}
+        for (user_id, summary_date), values in totals.items()
+    ]
+    if rows:
+        op.bulk_insert(daily_summaries, rows)
+
+
+def downgrade() -> None:
+    op.drop_table('daily_summaries')
@@ -0,0 +1,33 @@
+"""Index log tables by user and date and catalog tables by user
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 09:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_food_consuptions_user_id_consumption_date', 'food_consuptions', ['user_id', 'consumption_date'], unique=False)
+    op.create_index('ix_water_intakes_user_id_intake_date', 'water_intakes', ['user_id', 'intake_date'], unique=False)
+    op.create_index('ix_exercise_logs_user_id_practice_date', 'exercise_logs', ['user_id', 'practice_date'], unique=False)
+    op.create_index(op.f('ix_foods_user_id'), 'foods', ['user_id'], unique=False)
+    op.create_index(op.f('ix_exercises_user_id'), 'exercises', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_exercises_user_id'), table_name='exercises')
+    op.drop_index(op.f('ix_foods_user_id'), table_name='foods')
+    op.drop_index('ix_exercise_logs_user_id_practice_date', table_name='exercise_logs')
+    op.drop_index('ix_water_intakes_user_id_intake_date', table_name='water_intakes')
+    op.drop_index('ix_food_consuptions_user_id_consumption_date', table_name='food_consuptions')
@@ -0,0 +1,33 @@
+"""Index the users' items by id
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_food_consuptions_user_id_id', 'food_consuptions', ['user_id', 'id'], unique=False)
+    op.create_index('ix_water_intakes_user_id_id', 'water_intakes', ['user_id', 'id'], unique=False)
+    op.create_index('ix_exercise_logs_user_id_id', 'exercise_logs', ['user_id', 'id'], unique=False)
+    op.create_index('ix_meals_user_id_id', 'meals', ['user_id', 'id'], unique=False)
+    op.create_index('ix_reports_user_id_id', 'reports', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reports_user_id_id', table_name='reports')
+    op.drop_index('ix_meals_user_id_id', table_name='meals')
+    op.drop_index('ix_exercise_logs_user_id_id', table_name='exercise_logs')
+    op.drop_index('ix_water_intakes_user_id_id', table_name='water_intakes')
+    op.drop_index('ix_food_consuptions_user_id_id', table_name='food_consuptions')
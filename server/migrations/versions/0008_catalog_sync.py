@@ -0,0 +1,34 @@
+"""Track the catalog sync of foods and soft delete foods and serving sizes
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 10:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Plain ALTER TABLE statements, as recreating foods in batch mode would drop
+# the search triggers of 0002 on SQLite (dropping columns needs SQLite 3.35)
+
+
+def upgrade() -> None:
+    op.add_column('foods', sa.Column('content_hash', sa.String(), nullable=True))
+    op.add_column('foods', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    op.add_column('serving_sizes', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('serving_sizes', 'deleted_at')
+    op.drop_column('foods', 'deleted_at')
+    op.drop_column('foods', 'content_hash')
@@ -0,0 +1,53 @@
+"""Store the report jobs
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 11:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+REPORT_JOB_IN_FLIGHT = sa.text("status IN ('PENDING', 'RUNNING')")
+
+
+def upgrade() -> None:
+    op.create_table('report_jobs',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('report_date', sa.Date(), nullable=False),
+    sa.Column('inputs_hash', sa.String(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', name='reportjobstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('content', sa.String(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'uq_report_jobs_in_flight',
+        'report_jobs',
+        ['user_id', 'report_date', 'inputs_hash'],
+        unique=True,
+        postgresql_where=REPORT_JOB_IN_FLIGHT,
+        sqlite_where=REPORT_JOB_IN_FLIGHT,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_report_jobs_in_flight', table_name='report_jobs')
+    op.drop_table('report_jobs')
+    if op.get_context().dialect.name == 'postgresql':
+        op.execute('DROP TYPE reportjobstatus')
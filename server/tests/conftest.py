@@ -0,0 +1,124 @@
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Tuple
+
+import pytest
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+# The engine and the OpenAI client are created on import, so the tests get
+# their own database (and a key the fake OpenAI servers accept) first. That
+# is a new SQLite file, unless TEST_DATABASE_URL points to another one (see
+# README)
+os.environ["DATABASE_URL"] = (
+    os.getenv("TEST_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/test.db"
+)
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Food, ServingSize  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrate_database() -> None:
+    command.upgrade(Config(str(SERVER_DIR / "alembic.ini")), "head")
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[TestClient]:
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def user(client: TestClient) -> Dict[str, Any]:
+    """
+    A new user, with the headers authenticating their requests and their
+    default meals
+    """
+    response = client.post(
+        "/users/",
+        json={
+            "name": "Test",
+            "email": f"{uuid.uuid4().hex}@example.com",
+            "password": "password",
+        },
+    )
+    headers = {"Authorization": f"Bearer {response.json()['accessToken']}"}
+
+    return {
+        "headers": headers,
+        "meals": client.get("/users/me/meals", headers=headers).json(),
+    }
+
+
+@pytest.fixture
+def create_food() -> Callable[[], Dict[str, Any]]:
+    """
+    Creates a catalog food with two serving sizes, returning their ids
+    """
+
+    def create() -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            food_db = Food(
+                name="Arroz",
+                description=f"Arroz, cozido {uuid.uuid4().hex}",
+                calories=128.0,
+                carbohydrates=28.1,
+                proteins=2.5,
+                lipids=0.2,
+                serving_sizes=[
+                    ServingSize(
+                        name="100g", calories=128.0, carbohydrates=28.1, proteins=2.5, lipids=0.2
+                    ),
+                    ServingSize(
+                        name="Colher", calories=32.0, carbohydrates=7.0, proteins=0.6, lipids=0.1
+                    ),
+                ],
+            )
+            db.add(food_db)
+            db.commit()
+
+            return {
+                "id": food_db.id,
+                "serving_size_ids": [
+                    serving_size.id for serving_size in food_db.serving_sizes
+                ],
+            }
+        finally:
+            db.close()
+
+    return create
+
+
+@contextmanager
+def capture_statements() -> Iterator[List[Tuple[str, Any]]]:
+    """
+    Collects the SQL statements run inside the block, through either the
+    read or the writer sessions, along with their parameters
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def collect_statements() -> Callable[[], ContextManager[List[Tuple[str, Any]]]]:
+    return capture_statements
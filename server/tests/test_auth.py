@@ -0,0 +1,26 @@
+import uuid
+from datetime import timedelta
+
+from app.controllers.user_controller import create_token
+
+
+def test_tokens_carrying_only_the_email_are_still_accepted(client, user):
+    """
+    Access tokens issued before the user was embedded in the claims, see
+    get_current_user
+    """
+    email = client.get("/users/me", headers=user["headers"]).json()["email"]
+
+    token = create_token({"sub": email, "type": "access"}, timedelta(minutes=5))
+    response = client.get("/users/me", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["email"] == email
+
+    token = create_token(
+        {"sub": f"{uuid.uuid4().hex}@example.com", "type": "access"},
+        timedelta(minutes=5),
+    )
+    response = client.get("/users/me", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 401
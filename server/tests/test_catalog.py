@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+import uuid
+from typing import Iterator
+
+import pytest
+from sqlalchemy import update
+
+from app import catalog
+from app.catalog import sync_foods
+from app.database import SessionLocal
+from app.models import Food
+
+
+@pytest.fixture
+def catalog_foods() -> Iterator[None]:
+    """
+    Restores the catalog foods of the other tests, which a sync of a file
+    without them soft deletes
+    """
+    db = SessionLocal()
+    try:
+        food_ids = [
+            food_id
+            for food_id, in db.query(Food.id).filter(
+                Food.user_id.is_(None), Food.deleted_at.is_(None)
+            )
+        ]
+    finally:
+        db.close()
+
+    yield
+
+    db = SessionLocal()
+    try:
+        db.execute(update(Food).where(Food.id.in_(food_ids)).values(deleted_at=None))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_syncs_started_at_once_insert_the_catalog_once(
+    tmp_path, monkeypatch, catalog_foods
+):
+    token = uuid.uuid4().hex
+    path = tmp_path / "foods.json"
+    path.write_text(
+        json.dumps(
+            [
+                {
+                    "name": f"Caju {token}",
+                    "description": f"Caju {index}, polpa",
+                    "kcal": 43.0,
+                    "carbohydrates": 10.3,
+                    "protein": 0.9,
+                    "lipids": 0.3,
+                    "portions": [{"name": "Unidade (M)", "kcal": 43.0}],
+                }
+                for index in range(3)
+            ]
+        )
+    )
+
+    get_catalog_foods = catalog.get_catalog_foods
+
+    def get_catalog_foods_slowly(db):
+        catalog_foods = get_catalog_foods(db)
+        # Both syncs would read the catalog before either one inserts
+        time.sleep(0.5)
+        return catalog_foods
+
+    monkeypatch.setattr(catalog, "get_catalog_foods", get_catalog_foods_slowly)
+
+    errors = []
+
+    def sync():
+        db = SessionLocal()
+        try:
+            sync_foods(db, path)
+            db.commit()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=sync) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+
+    db = SessionLocal()
+    try:
+        descriptions = sorted(
+            description
+            for description, in db.query(Food.description).filter(
+                Food.name == f"Caju {token}", Food.user_id.is_(None)
+            )
+        )
+    finally:
+        db.close()
+
+    assert descriptions == [f"Caju {index}, polpa" for index in range(3)]
@@ -0,0 +1,144 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+import httpx
+import pytest
+import uvicorn
+from openai import OpenAI
+
+from app import reports
+from app.main import app
+
+DAY = "2024-11-20"
+TOKENS = ["Bom ", "dia"]
+
+
+class FakeOpenAIServer:
+    """
+    Local OpenAI server whose chat completions stream their first token
+    right away and the others only once `finish` is set, like a model still
+    generating
+    """
+
+    def __init__(self):
+        self.finish = threading.Event()
+        self.requests = 0
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                fake.requests += 1
+                self.rfile.read(int(self.headers["Content-Length"]))
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+
+                self.send_token(TOKENS[0])
+                fake.finish.wait()
+                for token in TOKENS[1:]:
+                    self.send_token(token)
+                self.wfile.write(b"data: [DONE]\n\n")
+
+            def send_token(self, token: str) -> None:
+                chunk = {
+                    "id": "chatcmpl-test",
+                    "object": "chat.completion.chunk",
+                    "created": 0,
+                    "model": "test",
+                    "choices": [
+                        {"index": 0, "delta": {"content": token}, "finish_reason": None}
+                    ],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1"
+
+
+@pytest.fixture
+def fake_openai(monkeypatch) -> Iterator[FakeOpenAIServer]:
+    fake = FakeOpenAIServer()
+    thread = threading.Thread(target=fake.server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(reports, "client", OpenAI(api_key="test", base_url=fake.url))
+
+    yield fake
+
+    fake.finish.set()
+    fake.server.shutdown()
+    fake.server.server_close()
+
+
+@pytest.fixture(scope="module")
+def server_url() -> Iterator[str]:
+    """
+    The app served by uvicorn, as the TestClient only hands out a streamed
+    body once the whole of it was sent
+    """
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("The server didn't start")
+        threading.Event().wait(0.01)
+
+    yield f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+    server.should_exit = True
+    thread.join()
+
+
+def test_report_stream_sends_the_first_token_before_the_model_finishes(
+    client, user, fake_openai, server_url
+):
+    with httpx.stream(
+        "GET",
+        f"{server_url}/users/me/daily-report/stream",
+        params={"date": DAY},
+        headers=user["headers"],
+        # The model doesn't finish until the first token was read, so a
+        # response buffered until the end times out
+        timeout=5,
+    ) as response:
+        assert response.status_code == 200
+        lines = response.iter_lines()
+
+        assert next(lines) == "event: token"
+        assert next(lines) == f"data: {json.dumps({'text': TOKENS[0]})}"
+        assert not fake_openai.finish.is_set()
+
+        fake_openai.finish.set()
+        rest = [line for line in lines if line]
+
+    assert rest == [
+        *(
+            line
+            for token in TOKENS[1:]
+            for line in ("event: token", f"data: {json.dumps({'text': token})}")
+        ),
+        "event: done",
+        "data: {}",
+    ]
+
+    # The full text was stored once the stream ended, so it is served
+    # without asking the model again
+    response = client.get(
+        "/users/me/daily-report", params={"date": DAY}, headers=user["headers"]
+    )
+    assert response.json() == {"generated_text": "".join(TOKENS)}
+    assert fake_openai.requests == 1
@@ -0,0 +1,104 @@
+from datetime import date
+from typing import Dict
+
+from app.database import SessionLocal
+from app.models import DailySummary
+
+DAYS = [date(2024, 11, 18), date(2024, 11, 19), date(2024, 11, 20)]
+# Stored in the summary of a day whose logs the test leaves alone, as if it
+# drifted. Only a rebuild of that day would fix it
+DRIFTED = -1
+
+
+def get_summaries(user_id: int) -> Dict[date, DailySummary]:
+    db = SessionLocal()
+    try:
+        return {
+            summary.summary_date: summary
+            for summary in db.query(DailySummary).filter(DailySummary.user_id == user_id)
+        }
+    finally:
+        db.close()
+
+
+def drift_summary(user_id: int, summary_date: date) -> None:
+    db = SessionLocal()
+    try:
+        db.query(DailySummary).filter(
+            DailySummary.user_id == user_id, DailySummary.summary_date == summary_date
+        ).update({"calories_intake": DRIFTED, "calories_burned": DRIFTED})
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_deleting_a_meal_rebuilds_only_the_days_it_was_logged_on(
+    client, user, create_food
+):
+    user_id = client.get("/users/me", headers=user["headers"]).json()["id"]
+    food = create_food()
+    first_meal, second_meal = user["meals"][:2]
+
+    response = client.post(
+        "/food-consumptions/batch",
+        json=[
+            {
+                "quantity": 1,
+                "consumptionDate": day.isoformat(),
+                "foodId": food["id"],
+                "mealId": meal["id"],
+                "servingSizeId": food["serving_size_ids"][0],
+            }
+            for day, meal in [
+                (DAYS[0], first_meal),
+                (DAYS[1], first_meal),
+                (DAYS[1], second_meal),
+                (DAYS[2], second_meal),
+            ]
+        ],
+        headers=user["headers"],
+    )
+    assert response.status_code == 200, response.text
+    drift_summary(user_id, DAYS[2])
+
+    response = client.delete(f"/meals/{first_meal['id']}", headers=user["headers"])
+    assert response.status_code == 200, response.text
+
+    summaries = get_summaries(user_id)
+    assert DAYS[0] not in summaries
+    assert summaries[DAYS[1]].calories_intake == 128
+    assert summaries[DAYS[2]].calories_intake == DRIFTED
+
+
+def test_deleting_an_exercise_rebuilds_only_the_days_it_was_practiced_on(client, user):
+    user_id = client.get("/users/me", headers=user["headers"]).json()["id"]
+    running, cycling = (
+        client.post(
+            "/exercises/",
+            json={"name": name, "caloriesPerHour": 600},
+            headers=user["headers"],
+        ).json()
+        for name in ("Corrida", "Ciclismo")
+    )
+
+    logs = [(DAYS[0], running), (DAYS[1], running), (DAYS[1], cycling), (DAYS[2], cycling)]
+    for day, exercise in logs:
+        response = client.post(
+            "/exercise-logs/",
+            json={
+                "durationInHours": 0.5,
+                "practiceDate": day.isoformat(),
+                "exerciseId": exercise["id"],
+            },
+            headers=user["headers"],
+        )
+        assert response.status_code == 200, response.text
+    drift_summary(user_id, DAYS[2])
+
+    response = client.delete(f"/exercises/{running['id']}", headers=user["headers"])
+    assert response.status_code == 200, response.text
+
+    summaries = get_summaries(user_id)
+    assert DAYS[0] not in summaries
+    assert summaries[DAYS[1]].calories_burned == 300
+    assert summaries[DAYS[2]].calories_burned == DRIFTED
@@ -0,0 +1,64 @@
+import uuid
+from datetime import datetime
+
+from app.database import SessionLocal
+from app.models import Food
+
+
+def add_foods(*foods: dict) -> list:
+    db = SessionLocal()
+    try:
+        foods_db = [
+            Food(calories=100.0, carbohydrates=10.0, proteins=5.0, lipids=1.0, **food)
+            for food in foods
+        ]
+        db.add_all(foods_db)
+        db.commit()
+
+        return [food_db.id for food_db in foods_db]
+    finally:
+        db.close()
+
+
+def search(client, user, q: str, **params) -> dict:
+    response = client.get(
+        "/foods/", params={"q": q, **params}, headers=user["headers"]
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_search_matches_prefixes_of_every_term_without_diacritics(client, user):
+    # Every search also matches the token, so foods of other tests don't
+    token = uuid.uuid4().hex
+    preto, _, _ = add_foods(
+        {"name": f"Feijão {token}", "description": "Feijão preto, cozido"},
+        {"name": f"Feijão {token}", "description": "Feijão carioca, cozido"},
+        {
+            "name": f"Feijão {token}",
+            "description": "Feijão preto, cru",
+            "deleted_at": datetime.utcnow(),
+        },
+    )
+
+    page = search(client, user, f"feijao pre {token}")
+
+    assert [item["id"] for item in page["items"]] == [preto]
+    assert page["nextAfter"] is None
+
+
+def test_search_ranks_name_matches_first_and_paginates(client, user):
+    token = uuid.uuid4().hex
+    butter, bread = add_foods(
+        {"name": f"Manteiga {token}", "description": "Manteiga para pão"},
+        {"name": f"Pão {token}", "description": "Pão francês"},
+    )
+
+    first_page = search(client, user, f"pao {token}", limit=1)
+    second_page = search(
+        client, user, f"pao {token}", limit=1, after=first_page["nextAfter"]
+    )
+
+    assert [item["id"] for item in first_page["items"]] == [bread]
+    assert [item["id"] for item in second_page["items"]] == [butter]
+    assert second_page["nextAfter"] is None
@@ -0,0 +1,192 @@
+import json
+import random
+from datetime import date
+
+import pytest
+
+from app import nutrition
+from app.database import SessionLocal
+from app.models import Exercise, ExerciseLog, FoodConsumption, ServingSize
+from app.nutrition import (
+    FOOD_CONSUMPTION_MACROS,
+    FoodConsumptionMacros,
+    compute_calories_burned,
+)
+from app.summaries import rebuild_daily_summaries
+
+DAY = date(2024, 11, 20)
+
+# Products exactly halfway between two integers, which round() takes to the
+# even one: 1.5 -> 2, 2.5 -> 2, 10.5 -> 10
+HALFWAY_PAIRS = [(3.0, 0.5), (5.0, 0.5), (7.0, 1.5), (0.5, 1.0), (1.25, 2.0)]
+
+
+@pytest.fixture(params=["numpy", "array"], autouse=True)
+def columns(request, monkeypatch) -> None:
+    """
+    Runs each test with numpy columns, when it is installed, and with the
+    array columns used without it
+    """
+    if request.param == "numpy" and nutrition.numpy is None:
+        pytest.skip("numpy is not installed")
+    if request.param == "array":
+        monkeypatch.setattr(nutrition, "numpy", None)
+
+
+def random_food_consumptions(count: int):
+    rng = random.Random(25)
+    food_consumptions = []
+
+    for index in range(count):
+        if index < len(HALFWAY_PAIRS):
+            nutrient, quantity = HALFWAY_PAIRS[index]
+            nutrients = dict.fromkeys(FOOD_CONSUMPTION_MACROS, nutrient)
+        else:
+            quantity = rng.choice([0.5, 1.0, 1.5, 2.5, rng.uniform(0, 10)])
+            nutrients = {
+                macro: rng.choice([rng.randint(0, 900), round(rng.uniform(0, 100), 1)])
+                for macro in FOOD_CONSUMPTION_MACROS
+            }
+
+        food_consumptions.append(
+            FoodConsumption(
+                quantity=quantity,
+                meal_id=rng.randint(1, 4),
+                serving_size=ServingSize(name="100g", **nutrients),
+            )
+        )
+
+    return food_consumptions
+
+
+def test_food_consumption_macros_match_the_per_item_properties():
+    food_consumptions = random_food_consumptions(5000)
+
+    macros = FoodConsumptionMacros.from_food_consumptions(food_consumptions)
+
+    expected = [
+        {macro: getattr(food_consumption, macro) for macro in FOOD_CONSUMPTION_MACROS}
+        for food_consumption in food_consumptions
+    ]
+    assert list(macros) == expected
+    assert all(type(value) is int for row in macros for value in row.values())
+
+    expected_by_meal = {}
+    for food_consumption, row in zip(food_consumptions, expected):
+        meal_totals = expected_by_meal.setdefault(
+            food_consumption.meal_id, dict.fromkeys(FOOD_CONSUMPTION_MACROS, 0)
+        )
+        for macro, value in row.items():
+            meal_totals[macro] += value
+
+    assert macros.totals_by(fc.meal_id for fc in food_consumptions) == expected_by_meal
+    assert macros.totals() == {
+        macro: sum(row[macro] for row in expected) for macro in FOOD_CONSUMPTION_MACROS
+    }
+
+    rows = [
+        (fc.quantity, *(getattr(fc.serving_size, m) for m in FOOD_CONSUMPTION_MACROS))
+        for fc in food_consumptions
+    ]
+    assert list(FoodConsumptionMacros.from_rows(rows)) == expected
+
+    no_macros = FoodConsumptionMacros.from_food_consumptions([])
+    assert list(no_macros) == [] and no_macros.totals_by([]) == {}
+
+
+def test_calories_burned_match_the_per_item_property():
+    rng = random.Random(25)
+    exercise_logs = [
+        ExerciseLog(duration_in_hours=duration, exercise=Exercise(calories_per_hour=calories))
+        for duration, calories in [(0.5, 3), (0.5, 5), (1.5, 7)]
+    ] + [
+        ExerciseLog(
+            duration_in_hours=rng.choice([0.25, 0.5, 1.5, rng.uniform(0, 3)]),
+            exercise=Exercise(calories_per_hour=rng.randint(50, 1200)),
+        )
+        for _ in range(5000)
+    ]
+
+    calories_burned = compute_calories_burned(
+        (exercise_log.duration_in_hours for exercise_log in exercise_logs),
+        (exercise_log.exercise.calories_per_hour for exercise_log in exercise_logs),
+    )
+
+    assert calories_burned == [
+        exercise_log.calories_burned for exercise_log in exercise_logs
+    ]
+
+
+def test_overview_history_and_export_match_the_per_item_values(
+    client, user, create_food
+):
+    food = create_food()
+    response = client.post(
+        "/food-consumptions/batch",
+        json=[
+            {
+                # 7.0 carbohydrates * 1.5 is halfway, 10.5
+                "quantity": quantity,
+                "consumptionDate": DAY.isoformat(),
+                "foodId": food["id"],
+                "mealId": meal["id"],
+                "servingSizeId": food["serving_size_ids"][1],
+            }
+            for meal in user["meals"][:2]
+            for quantity in (1.5, 2.5, 0.3)
+        ],
+        headers=user["headers"],
+    )
+    assert response.status_code == 200, response.text
+
+    overview = client.get(
+        "/users/me/daily-overview",
+        params={"date": DAY.isoformat()},
+        headers=user["headers"],
+    ).json()
+
+    expected_meal_totals = {}
+    for food_consumption in overview["foodConsumptions"]:
+        meal_totals = expected_meal_totals.setdefault(
+            food_consumption["mealId"],
+            {"mealId": food_consumption["mealId"], **dict.fromkeys(FOOD_CONSUMPTION_MACROS, 0)},
+        )
+        for macro in FOOD_CONSUMPTION_MACROS:
+            meal_totals[macro] += food_consumption[macro]
+
+    assert overview["mealTotals"] == sorted(
+        expected_meal_totals.values(), key=lambda meal_totals: meal_totals["mealId"]
+    )
+
+    # The history reads the summaries, which the rebuild computes in batches
+    user_id = client.get("/users/me", headers=user["headers"]).json()["id"]
+    db = SessionLocal()
+    try:
+        rebuild_daily_summaries(db, [user_id])
+        db.commit()
+    finally:
+        db.close()
+
+    history = client.get(
+        "/users/me/history",
+        params={"from": DAY.isoformat(), "to": DAY.isoformat()},
+        headers=user["headers"],
+    ).json()
+    [bucket] = history["buckets"]
+    assert bucket["totalCaloriesIntake"] == overview["totalCaloriesIntake"]
+    for macro in FOOD_CONSUMPTION_MACROS[1:]:
+        assert bucket[f"total{macro.title()}"] == sum(
+            food_consumption[macro] for food_consumption in overview["foodConsumptions"]
+        )
+
+    export = client.get("/users/me/export", headers=user["headers"])
+    records = {
+        record["id"]: record
+        for record in map(json.loads, export.text.splitlines())
+        if record["type"] == "foodConsumption"
+    }
+
+    for food_consumption in overview["foodConsumptions"]:
+        record = records[food_consumption["id"]]
+        for macro in FOOD_CONSUMPTION_MACROS:
+            assert record[macro] == food_consumption[macro]
@@ -0,0 +1,124 @@
+from datetime import date
+
+import pytest
+
+from app.database import SessionLocal
+from app.summaries import rebuild_daily_summaries
+
+DAY = date(2024, 11, 20)
+
+
+def log_day(client, user, create_food, count: int) -> None:
+    """
+    Logs `count` food consumptions of distinct foods across the user's
+    meals, and an exercise, so every row references its own relationships
+    """
+    food_consumptions = []
+    for index in range(count):
+        food = create_food()
+        food_consumptions.append({
+            "quantity": 1.5,
+            "consumptionDate": DAY.isoformat(),
+            "foodId": food["id"],
+            "mealId": user["meals"][index % len(user["meals"])]["id"],
+            "servingSizeId": food["serving_size_ids"][index % 2],
+        })
+
+    response = client.post(
+        "/food-consumptions/batch", json=food_consumptions, headers=user["headers"]
+    )
+    assert response.status_code == 200, response.text
+
+    exercise = client.post(
+        "/exercises/",
+        json={"name": "Corrida", "caloriesPerHour": 600},
+        headers=user["headers"],
+    ).json()
+    response = client.post(
+        "/exercise-logs/",
+        json={
+            "durationInHours": 0.5,
+            "practiceDate": DAY.isoformat(),
+            "exerciseId": exercise["id"],
+        },
+        headers=user["headers"],
+    )
+    assert response.status_code == 200, response.text
+
+
+@pytest.mark.parametrize(
+    "path",
+    ["/users/me/food-consumptions", "/users/me/exercise-logs", "/users/me/daily-overview"],
+)
+@pytest.mark.parametrize("view", ["full", "compact"])
+def test_log_reads_run_a_fixed_number_of_statements(
+    client, user, create_food, collect_statements, path, view
+):
+    counts = []
+
+    for count in (1, 10):
+        log_day(client, user, create_food, count)
+
+        with collect_statements() as statements:
+            response = client.get(
+                path,
+                params={"date": DAY.isoformat(), "view": view},
+                headers=user["headers"],
+            )
+
+        assert response.status_code == 200, response.text
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1], counts
+
+
+def test_batch_create_runs_a_fixed_number_of_statements(
+    client, user, create_food, collect_statements
+):
+    counts = []
+
+    for count in (1, 20):
+        food = create_food()
+        food_consumptions = [
+            {
+                "quantity": 1.0,
+                "consumptionDate": DAY.isoformat(),
+                "foodId": food["id"],
+                "mealId": user["meals"][index % len(user["meals"])]["id"],
+                "servingSizeId": food["serving_size_ids"][index % 2],
+            }
+            for index in range(count)
+        ]
+
+        with collect_statements() as statements:
+            response = client.post(
+                "/food-consumptions/batch",
+                json=food_consumptions,
+                headers=user["headers"],
+            )
+
+        assert response.status_code == 200, response.text
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1], counts
+
+
+def test_rebuild_daily_summaries_runs_a_fixed_number_of_statements(
+    client, user, create_food, collect_statements
+):
+    counts = []
+
+    for count in (1, 10):
+        log_day(client, user, create_food, count)
+
+        db = SessionLocal()
+        try:
+            with collect_statements() as statements:
+                rebuild_daily_summaries(db)
+                db.commit()
+        finally:
+            db.close()
+
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1], counts
@@ -0,0 +1,107 @@
+import re
+from datetime import date
+
+import pytest
+
+from app.database import engine
+from app.pagination import encode_cursor
+
+pytestmark = pytest.mark.skipif(
+    engine.dialect.name != "sqlite", reason="The plans checked are SQLite's"
+)
+
+DAY = date(2024, 11, 20).isoformat()
+# Past the first page, so keyset pages filter on the id as well
+AFTER = encode_cursor(1)
+
+# Requests of the hot reads, the table of the query checked and the index
+# its plan must use
+HOT_READS = {
+    "food consumptions of a day": (
+        "/users/me/food-consumptions",
+        {"date": DAY},
+        "food_consuptions",
+        "ix_food_consuptions_user_id_consumption_date",
+    ),
+    "compact food consumptions of a day": (
+        "/users/me/food-consumptions",
+        {"date": DAY, "view": "compact"},
+        "food_consuptions",
+        "ix_food_consuptions_user_id_consumption_date",
+    ),
+    "daily overview": (
+        "/users/me/daily-overview",
+        {"date": DAY},
+        "food_consuptions",
+        "ix_food_consuptions_user_id_consumption_date",
+    ),
+    "water intakes of a day": (
+        "/users/me/water-intakes",
+        {"date": DAY},
+        "water_intakes",
+        "ix_water_intakes_user_id_intake_date",
+    ),
+    "exercise logs of a day": (
+        "/users/me/exercise-logs",
+        {"date": DAY},
+        "exercise_logs",
+        "ix_exercise_logs_user_id_practice_date",
+    ),
+    "page of food consumptions": (
+        "/food-consumptions/",
+        {"after": AFTER},
+        "food_consuptions",
+        "ix_food_consuptions_user_id_id",
+    ),
+    "page of water intakes": (
+        "/water-intakes/",
+        {"after": AFTER},
+        "water_intakes",
+        "ix_water_intakes_user_id_id",
+    ),
+    "page of exercise logs": (
+        "/exercise-logs/",
+        {"after": AFTER},
+        "exercise_logs",
+        "ix_exercise_logs_user_id_id",
+    ),
+    "page of meals": ("/meals/", {"after": AFTER}, "meals", "ix_meals_user_id_id"),
+    "page of reports": ("/reports/", {"after": AFTER}, "reports", "ix_reports_user_id_id"),
+    "user's foods": ("/users/me/foods", {}, "foods", "ix_foods_user_id"),
+    "user's exercises": ("/users/me/exercises", {}, "exercises", "ix_exercises_user_id"),
+}
+
+
+def explain(statement: str, parameters) -> str:
+    """
+    Returns the details of the SQLite query plan, one step per line
+    """
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        ).all()
+
+    return "\n".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize("name", HOT_READS)
+def test_hot_reads_use_their_index(client, user, collect_statements, name):
+    path, params, table, index = HOT_READS[name]
+
+    with collect_statements() as statements:
+        response = client.get(path, params=params, headers=user["headers"])
+
+    assert response.status_code == 200, response.text
+
+    # The query selecting from the table, rather than the ones loading its
+    # relationships
+    from_table = re.compile(rf"\bFROM {table}\b")
+    [(statement, parameters), *_] = [
+        (statement, parameters)
+        for statement, parameters in statements
+        if statement.lstrip().startswith("SELECT") and from_table.search(statement)
+    ]
+
+    plan = explain(statement, parameters)
+
+    assert f"INDEX {index} " in plan, f"{statement}\n{plan}"
@@ -0,0 +1,48 @@
+import asyncio
+from datetime import date, timedelta
+
+from app import report_jobs
+from app.enums import ReportJobStatus
+from app.report_jobs import ReportJobQueue, get_report_job
+
+DAY = date(2024, 11, 20)
+STALE_AFTER = timedelta(seconds=1)
+
+
+def test_jobs_waiting_for_their_turn_are_not_failed_as_stale(client, user, monkeypatch):
+    user_id = client.get("/users/me", headers=user["headers"]).json()["id"]
+    monkeypatch.setattr(
+        report_jobs, "generate_report", lambda user_id, report_date, prompt: "Bom dia"
+    )
+
+    async def run():
+        queue = ReportJobQueue(
+            max_concurrency=1,
+            max_attempts=1,
+            retry_backoff_in_seconds=0,
+            retention=timedelta(minutes=30),
+            stale_after=STALE_AFTER,
+            heartbeat_interval_in_seconds=0.2,
+        )
+
+        # Another job holds the only slot for longer than the stale window
+        await queue._semaphore.acquire()
+        job = await queue.enqueue(user_id, DAY, "prompt")
+        await asyncio.sleep(STALE_AFTER.total_seconds() * 2)
+
+        # Enqueueing again cleans up stale jobs and reuses the queued one
+        duplicate = await queue.enqueue(user_id, DAY, "prompt")
+        assert duplicate.id == job.id
+        assert (await queue.get(job.id)).status is ReportJobStatus.PENDING
+
+        queue._semaphore.release()
+        await queue.wait(job.id, timeout=5)
+
+        return await queue.get(job.id)
+
+    job = asyncio.run(run())
+
+    assert job.status is ReportJobStatus.COMPLETED
+    assert job.content == "Bom dia"
+    assert job.attempts == 1
+    assert get_report_job(job.id).finished_at is not None